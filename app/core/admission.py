@@ -0,0 +1,89 @@
+import asyncio
+
+from anyio import to_thread
+from starlette.responses import JSONResponse
+
+
+class AdmissionControlMiddleware:
+    """
+    Per route class concurrency limits (checkout, cart, browse, admin,
+    login, background).
+
+    Every request is classified by method and path prefix and must take
+    a slot from its class before it runs. A class that is full queues
+    for at most queue_timeout seconds and then gets a 503, so a browse
+    storm can only ever occupy the browse slots and checkout/admin keep
+    their reserved capacity. The shared AnyIO threadpool is sized to the
+    sum of all classes plus headroom for dependencies.
+    """
+
+    def __init__(self, app, capacities: dict, routes: list, default_class: str, queue_timeout: float, thread_headroom: int = 8):
+        self.app = app
+        self.capacities = capacities
+        self.routes = [
+            (method.upper(), prefix, route_class)
+            for method, prefix, route_class in routes
+        ]
+        self.default_class = default_class
+        self.queue_timeout = queue_timeout
+        self.thread_headroom = thread_headroom
+        self.slots = {name: asyncio.Semaphore(capacity) for name, capacity in capacities.items()}
+        self.running = {name: 0 for name in capacities}
+        self.waiting = {name: 0 for name in capacities}
+        self.rejected = {name: 0 for name in capacities}
+        self._threads_sized = False
+
+    def classify(self, method: str, path: str) -> str:
+        for route_method, prefix, route_class in self.routes:
+            if route_method in ("*", method) and path.startswith(prefix):
+                return route_class
+        return self.default_class
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        if not self._threads_sized:
+            limiter = to_thread.current_default_thread_limiter()
+            limiter.total_tokens = max(
+                limiter.total_tokens,
+                sum(self.capacities.values()) + self.thread_headroom
+            )
+            self._threads_sized = True
+
+        route_class = self.classify(scope["method"], scope["path"])
+        slots = self.slots.get(route_class)
+        if slots is None:
+            return await self.app(scope, receive, send)
+
+        self.waiting[route_class] += 1
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected[route_class] += 1
+            response = JSONResponse(
+                {"detail": "Server busy, retry shortly"},
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
+            return await response(scope, receive, send)
+        finally:
+            self.waiting[route_class] -= 1
+
+        self.running[route_class] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.running[route_class] -= 1
+            slots.release()
+
+    def stats(self):
+        return {
+            name: {
+                "capacity": capacity,
+                "running": self.running[name],
+                "waiting": self.waiting[name],
+                "rejected": self.rejected[name]
+            }
+            for name, capacity in self.capacities.items()
+        }
@@ -0,0 +1,443 @@
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import namedtuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.invalidation import on_invalidate
+from app.db.session import engine
+from app.models.brand import Brand
+from app.models.categories import Category
+from app.models.products import Product
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, every process builds its own file
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file layout (little endian):
+#
+#     header      magic, format, version (build time in ns) and counts
+#     categories  fixed-size records sorted by category_id
+#     brands      fixed-size records sorted by brand_id
+#     products    fixed-size records sorted by product_id
+#     by_category u32 product indexes grouped per category
+#     by_brand    u32 product indexes grouped per brand
+#     strings     u32 length + utf-8 bytes, referenced by offset
+#
+# String fields hold an offset into the strings section (NO_STRING for
+# None); categories and brands keep the (start, count) of their slice of
+# by_category / by_brand so listings never scan all products.
+
+MAGIC = b"WCAT"
+FORMAT = 1
+NO_STRING = 0xFFFFFFFF
+
+HEADER = struct.Struct("<4sHxxQIII")
+# category_id, name, description, image, start, count, is_active
+CATEGORY = struct.Struct("<IIIIIIB3x")
+# brand_id, name, image, start, count, is_active
+BRAND = struct.Struct("<IIIIIB3x")
+# product_id, name, description, image, category index, brand index,
+# mrp, price, min_order_qty, stock
+PRODUCT = struct.Struct("<IIIIIIddii")
+# stock is the record's last field; checkouts patch it in place
+STOCK = struct.Struct("<i")
+STOCK_OFFSET = PRODUCT.size - STOCK.size
+INDEX = struct.Struct("<I")
+LENGTH = struct.Struct("<I")
+
+CategoryRow = namedtuple("CategoryRow", "category_id name description image is_active")
+BrandRow = namedtuple("BrandRow", "brand_id name image is_active")
+ProductRow = namedtuple(
+    "ProductRow",
+    "product_id name description image category_id brand_id "
+    "category_name brand_name mrp price min_order_qty stock"
+)
+
+
+# ==========================================================
+# BUILDING
+# ==========================================================
+
+class _Strings:
+    def __init__(self):
+        self.blob = bytearray()
+        self.offsets = {}
+
+    def add(self, value):
+        if value is None:
+            return NO_STRING
+        offset = self.offsets.get(value)
+        if offset is None:
+            offset = len(self.blob)
+            data = value.encode("utf-8")
+            self.blob += LENGTH.pack(len(data)) + data
+            self.offsets[value] = offset
+        return offset
+
+
+def _group(products, key_index, keys):
+    """Product indexes grouped by category/brand index, plus (start, count) per key."""
+    groups = [[] for _ in keys]
+    for i, p in enumerate(products):
+        groups[p[key_index]].append(i)
+
+    ranges, flat = [], []
+    for group in groups:
+        ranges.append((len(flat), len(group)))
+        flat.extend(group)
+    return ranges, flat
+
+
+def build_snapshot(db, path: str):
+    """Write the current catalog to `path`, replacing any previous file atomically."""
+    # Sorted here rather than by ORDER BY: lookups bisect with Python's
+    # codepoint comparison, which the database collation need not match
+    categories = sorted(db.execute(
+        select(Category.category_id, Category.name, Category.description, Category.image, Category.is_active)
+        .where(Category.category_id.isnot(None))
+    ).all(), key=lambda c: c.category_id)
+    brands = sorted(db.execute(
+        select(Brand.brand_id, Brand.name, Brand.image, Brand.is_active)
+        .where(Brand.brand_id.isnot(None))
+    ).all(), key=lambda b: b.brand_id)
+
+    category_index = {c.category_id: i for i, c in enumerate(categories)}
+    brand_index = {b.brand_id: i for i, b in enumerate(brands)}
+
+    products = [
+        (p.product_id, p.name, p.description, p.image,
+         category_index[p.category_id], brand_index[p.brand_id],
+         float(p.mrp), float(p.price), p.min_order_qty or 0, p.stock or 0)
+        for p in sorted(db.execute(
+            select(
+                Product.product_id, Product.name, Product.description, Product.image,
+                Product.category_id, Product.brand_id, Product.mrp, Product.price,
+                Product.min_order_qty, Product.stock
+            )
+            .where(Product.is_active == True, Product.product_id.isnot(None))
+        ).all(), key=lambda p: p.product_id)
+        if p.category_id in category_index and p.brand_id in brand_index
+    ]
+
+    category_ranges, by_category = _group(products, 4, categories)
+    brand_ranges, by_brand = _group(products, 5, brands)
+
+    strings = _Strings()
+    body = bytearray()
+    for c, (start, count) in zip(categories, category_ranges):
+        body += CATEGORY.pack(
+            strings.add(c.category_id), strings.add(c.name), strings.add(c.description),
+            strings.add(c.image), start, count, bool(c.is_active)
+        )
+    for b, (start, count) in zip(brands, brand_ranges):
+        body += BRAND.pack(
+            strings.add(b.brand_id), strings.add(b.name), strings.add(b.image),
+            start, count, bool(b.is_active)
+        )
+    for p in products:
+        body += PRODUCT.pack(
+            strings.add(p[0]), strings.add(p[1]), strings.add(p[2]), strings.add(p[3]),
+            *p[4:]
+        )
+    body += struct.pack(f"<{len(by_category)}I", *by_category)
+    body += struct.pack(f"<{len(by_brand)}I", *by_brand)
+
+    version = time.time_ns()
+    header = HEADER.pack(MAGIC, FORMAT, version, len(categories), len(brands), len(products))
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.write(strings.blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+    logger.info(
+        "Catalog snapshot %s written: %d categories, %d brands, %d products",
+        version, len(categories), len(brands), len(products)
+    )
+    return version
+
+
+# ==========================================================
+# READING
+# ==========================================================
+
+class CatalogSnapshot:
+    """
+    Read-only view over a mapped snapshot file. Pages are shared between
+    every worker mapping the same file; rows are decoded on access.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, self.version, self.n_categories, self.n_brands, self.n_products = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"Unsupported catalog snapshot format in {path}")
+
+        self._categories = HEADER.size
+        self._brands = self._categories + self.n_categories * CATEGORY.size
+        self._products = self._brands + self.n_brands * BRAND.size
+        self._by_category = self._products + self.n_products * PRODUCT.size
+        self._by_brand = self._by_category + self.n_products * INDEX.size
+        self._strings = self._by_brand + self.n_products * INDEX.size
+
+        if self._strings > len(self._map):
+            raise ValueError(f"Truncated catalog snapshot {path}")
+
+    def _string(self, offset):
+        if offset == NO_STRING:
+            return None
+        start = self._strings + offset
+        (length,) = LENGTH.unpack_from(self._map, start)
+        return self._map[start + LENGTH.size:start + LENGTH.size + length].decode("utf-8")
+
+    def _category_record(self, i):
+        return CATEGORY.unpack_from(self._map, self._categories + i * CATEGORY.size)
+
+    def _brand_record(self, i):
+        return BRAND.unpack_from(self._map, self._brands + i * BRAND.size)
+
+    def _product_record(self, i):
+        return PRODUCT.unpack_from(self._map, self._products + i * PRODUCT.size)
+
+    def _search(self, count, record, key):
+        # Binary search over records sorted by their business id
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            value = self._string(record(mid)[0])
+            if value < key:
+                lo = mid + 1
+            elif value > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def _category(self, i):
+        cid, name, description, image, _, _, is_active = self._category_record(i)
+        return CategoryRow(self._string(cid), self._string(name), self._string(description),
+                           self._string(image), bool(is_active))
+
+    def _brand(self, i):
+        bid, name, image, _, _, is_active = self._brand_record(i)
+        return BrandRow(self._string(bid), self._string(name), self._string(image), bool(is_active))
+
+    def _product(self, i):
+        pid, name, description, image, c, b, mrp, price, min_order_qty, stock = self._product_record(i)
+        return ProductRow(
+            self._string(pid), self._string(name), self._string(description), self._string(image),
+            self._string(self._category_record(c)[0]), self._string(self._brand_record(b)[0]),
+            self._string(self._category_record(c)[1]), self._string(self._brand_record(b)[1]),
+            mrp, price, min_order_qty, stock
+        )
+
+    def _slice(self, base, start, count):
+        return [
+            self._product(INDEX.unpack_from(self._map, base + (start + k) * INDEX.size)[0])
+            for k in range(count)
+        ]
+
+    def categories(self):
+        return [c for c in map(self._category, range(self.n_categories)) if c.is_active]
+
+    def brands(self):
+        return [b for b in map(self._brand, range(self.n_brands)) if b.is_active]
+
+    def products(self):
+        return [self._product(i) for i in range(self.n_products)]
+
+    def product(self, product_id: str):
+        i = self._search(self.n_products, self._product_record, product_id)
+        return self._product(i) if i is not None else None
+
+    def products_by_category(self, category_id: str):
+        i = self._search(self.n_categories, self._category_record, category_id)
+        if i is None:
+            return []
+        _, _, _, _, start, count, _ = self._category_record(i)
+        return self._slice(self._by_category, start, count)
+
+    def products_by_brand(self, brand_id: str):
+        i = self._search(self.n_brands, self._brand_record, brand_id)
+        if i is None:
+            return []
+        _, _, _, start, count, _ = self._brand_record(i)
+        return self._slice(self._by_brand, start, count)
+
+    def stock_offset(self, product_id: str):
+        """File offset of a product's stock field, or None if it isn't in the snapshot."""
+        i = self._search(self.n_products, self._product_record, product_id)
+        return None if i is None else self._products + i * PRODUCT.size + STOCK_OFFSET
+
+
+def patch_stock(db, path: str, product_ids):
+    """
+    Write the current stock of `product_ids` into the snapshot at `path`
+    in place. Every worker maps the file shared, so they see the new
+    values without remapping. Returns the number of records patched.
+    """
+    rows = db.execute(
+        select(Product.product_id, Product.stock).where(Product.product_id.in_(list(product_ids)))
+    ).all()
+    snapshot = CatalogSnapshot(path)
+    patched = 0
+    with open(path, "r+b") as f:
+        for product_id, stock in rows:
+            offset = snapshot.stock_offset(product_id)
+            if offset is not None:  # inactive products aren't in the snapshot
+                os.pwrite(f.fileno(), STOCK.pack(stock or 0), offset)
+                patched += 1
+    return patched
+
+
+# Rebuilds swap the file with os.replace, so a changed inode means a new
+# version (stock patches rewrite bytes in place and keep the mapping);
+# workers stat at most this often
+CHECK_INTERVAL_SECONDS = 0.5
+
+_current = None
+_current_key = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def current_catalog() -> CatalogSnapshot | None:
+    """The newest mapped snapshot, or None (disabled / not built yet) to fall back to the DB."""
+    global _current, _current_key, _checked_at
+
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        return None
+
+    now = time.monotonic()
+    if now - _checked_at < CHECK_INTERVAL_SECONDS:
+        return _current
+
+    with _lock:
+        _checked_at = now
+        try:
+            st = os.stat(settings.CATALOG_SNAPSHOT_PATH)
+        except FileNotFoundError:
+            _current = _current_key = None
+            return None
+
+        key = (st.st_dev, st.st_ino)
+        if key != _current_key:
+            try:
+                # The previous map is unmapped once the last request using it drops it
+                _current = CatalogSnapshot(settings.CATALOG_SNAPSHOT_PATH)
+                _current_key = key
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning("Ignoring catalog snapshot: %s", e)
+                _current = _current_key = None
+        return _current
+
+
+# ==========================================================
+# BUILDER
+# ==========================================================
+
+# Wakes the builder; _rebuild asks for a full rebuild, _stock_ids for
+# stock-only patches (checkouts), which don't re-read the catalog
+_dirty = threading.Event()
+_rebuild = False
+_stock_ids = set()
+_pending_lock = threading.Lock()
+
+
+@on_invalidate("category")
+@on_invalidate("brand")
+@on_invalidate("product")
+def _mark_dirty(entity_id):
+    global _rebuild
+    with _pending_lock:
+        _rebuild = True
+    _dirty.set()
+
+
+@on_invalidate("stock")
+def _mark_stock_changed(product_id):
+    global _rebuild
+    with _pending_lock:
+        if product_id is None:
+            _rebuild = True
+        else:
+            _stock_ids.add(product_id)
+    _dirty.set()
+
+
+def _take_pending():
+    global _rebuild, _stock_ids
+    with _pending_lock:
+        rebuild, stock_ids = _rebuild, _stock_ids
+        _rebuild, _stock_ids = False, set()
+    return rebuild, stock_ids
+
+
+def _acquire_builder_lock():
+    if fcntl is None:
+        return True
+    f = open(settings.CATALOG_SNAPSHOT_PATH + ".lock", "a")
+    try:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f  # held (and the lock with it) for the life of the process
+
+
+def _builder_loop():
+    lock = None
+    while True:
+        if lock is None:
+            lock = _acquire_builder_lock()
+            if lock is None:
+                # Another worker builds; retry in case it exits
+                time.sleep(settings.CATALOG_SNAPSHOT_REFRESH_SECONDS)
+                continue
+            _mark_dirty(None)
+
+        if _dirty.wait(timeout=settings.CATALOG_SNAPSHOT_REFRESH_SECONDS):
+            # Coalesce bursts (bulk edits, cascades) into one rebuild
+            time.sleep(0.2)
+        else:
+            _mark_dirty(None)  # periodic refresh
+        _dirty.clear()
+        rebuild, stock_ids = _take_pending()
+
+        # Straight to the primary: a replica may not have the change
+        # that triggered this rebuild yet. A rebuild reads current
+        # stock too, so pending patches are dropped with it.
+        try:
+            with engine.connect() as conn:
+                if rebuild or not os.path.exists(settings.CATALOG_SNAPSHOT_PATH):
+                    build_snapshot(conn, settings.CATALOG_SNAPSHOT_PATH)
+                elif stock_ids:
+                    patch_stock(conn, settings.CATALOG_SNAPSHOT_PATH, stock_ids)
+        except Exception:
+            logger.exception("Catalog snapshot build failed")
+
+
+def start_catalog_builder():
+    """
+    Start the builder thread. Every worker calls this; the one holding
+    the lock file writes snapshots, the rest only map them.
+    """
+    if not settings.CATALOG_SNAPSHOT_ENABLED:
+        return
+    threading.Thread(target=_builder_loop, name="catalog-snapshot", daemon=True).start()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -12,6 +14,146 @@ class Settings(BaseSettings):
     BREVO_API_KEY: str
     ADMIN_EMAIL: str
 
+    # Connection pool, applied to every engine. Each worker has a sync and
+    # an async engine on the primary plus one LISTEN connection, so the
+    # primary sees up to workers * (2 * (pool + overflow) + 1) connections
+    # and each read replica workers * 2 * (pool + overflow); keep both
+    # under the database's max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # Ping on every checkout; with a recycle shorter than the server's
+    # idle timeout this can be turned off to save a round trip
+    DB_POOL_PRE_PING: bool = True
+    # Per-statement timeout applied on connect (0 = server default)
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    # Async (asyncpg) engine for the storefront; derived from
+    # DATABASE_URL when not set
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Read replicas (same driver as DATABASE_URL); reads are spread over
+    # them while writes and recent writers' reads stay on the primary
+    READ_REPLICA_URLS: list[str] = []
+    READ_YOUR_WRITES_SECONDS: int = 5
+    READ_YOUR_WRITES_IGNORED_TABLES: list[str] = ["user_visits"]
+
+    # Cross-worker cache eviction over Postgres LISTEN/NOTIFY
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_HEARTBEAT_SECONDS: int = 30
+
+    # Memory-mapped catalog snapshot shared by all workers on a host;
+    # rebuilt on catalog changes and at least every REFRESH_SECONDS
+    CATALOG_SNAPSHOT_ENABLED: bool = True
+    CATALOG_SNAPSHOT_PATH: str = os.path.join(tempfile.gettempdir(), "wholesale-catalog.snapshot")
+    CATALOG_SNAPSHOT_REFRESH_SECONDS: int = 300
+
+    # Startup warm-up; /ready answers 503 until it has run
+    WARMUP_ENABLED: bool = True
+    WARMUP_POOL_CONNECTIONS: int = 2
+    WARMUP_CATALOG_TIMEOUT_SECONDS: int = 20
+
+    # Per-request statement counts (X-DB-Queries / Server-Timing headers);
+    # N+1 detection defaults to on outside production
+    QUERY_STATS_ENABLED: bool = True
+    QUERY_N_PLUS_ONE_DETECTION: bool | None = None
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Prometheus /metrics is only served once METRICS_TOKEN is set;
+    # scrapers send it as "Authorization: Bearer <token>"
+    HTTP_METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str | None = None
+
+    # Statements slower than this (0 = off) are logged and kept for
+    # /admin/metrics/slow-queries; EXPLAIN runs them again, so it is opt-in
+    SLOW_QUERY_THRESHOLD_MS: int = 500
+    SLOW_QUERY_LOG_SIZE: int = 200
+    SLOW_QUERY_EXPLAIN: bool = False
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 10000
+
+    # On-demand profiles (super admin + "X-Profile: 1"), listed at /admin/profiles
+    PROFILING_ENABLED: bool = True
+    PROFILE_INTERVAL_MS: float = 2
+    PROFILE_DIR: str = os.path.join(tempfile.gettempdir(), "wholesale-profiles")
+    PROFILE_MAX_FILES: int = 50
+
+    # tracemalloc diagnostics under /admin/diagnostics/memory; tracing is
+    # off until a super admin starts it, per worker
+    MEMORY_TRACE_FRAMES: int = 10
+    MEMORY_SNAPSHOTS_KEPT: int = 5
+
+    # Logging: JSON lines (or "text") on stdout through a background queue.
+    # LOG_LEVELS overrides per logger, e.g. {"app.db.query_stats": "DEBUG"};
+    # identical message templates beyond the per-minute limit are dropped
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict[str, str] = {}
+    LOG_FORMAT: str = "json"
+    LOG_RATE_LIMIT_PER_MINUTE: int = 60
+    LOG_RATE_LIMIT_EXEMPT: list[str] = ["uvicorn.access"]
+
+    # Admin principals resolved by get_current_admin
+    ADMIN_CACHE_TTL_SECONDS: int = 30
+    ADMIN_CACHE_MAX_SIZE: int = 1024
+
+    # bcrypt runs on its own small pool, away from the request threadpool
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    # Login attempts allowed per minute (bucket size == per-minute rate)
+    LOGIN_ATTEMPTS_PER_USERNAME: int = 10
+    LOGIN_ATTEMPTS_PER_IP: int = 30
+
+    # Reverse proxies in front of the app that append to X-Forwarded-For
+    # (1 for a single nginx/load balancer, and on Render). 0 ignores the
+    # header and uses the socket peer, which behind a proxy puts every
+    # client on one key; more than the real count lets clients spoof it
+    TRUSTED_PROXY_HOPS: int = 0
+
+    # Public API rate limits: path prefix -> [tokens per second, burst].
+    # The longest matching prefix wins; unmatched paths are not limited.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_GROUPS: dict[str, list[float]] = {
+        "/user/products": [5, 20],
+        "/user": [10, 40],
+        "/admin": [20, 60],
+    }
+    # Buckets are per session_id cookie when present; each client IP may
+    # use up to this many sessions' worth of tokens in total
+    RATE_LIMIT_SESSIONS_PER_IP: int = 20
+    # Shed with 503 above this many concurrent limited requests, or when
+    # this many DB connections are checked out (0 disables the pool check)
+    MAX_IN_FLIGHT_REQUESTS: int = 200
+    SHED_POOL_CHECKED_OUT: int = 0
+    # Also shed when the recent average pool wait exceeds this (0 disables);
+    # the average halves every 2 s without checkouts, so shedding lets up
+    SHED_POOL_WAIT_MS: int = 0
+
+    # Admission control: concurrent requests allowed per route class.
+    # Routes are [method or "*", path prefix, class], first match wins;
+    # paths matching no route (static files, health) are not limited.
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_CAPACITY: dict[str, int] = {
+        "checkout": 8,
+        "cart": 8,
+        "browse": 16,
+        "admin": 6,
+        # Logins wait on the bcrypt pool; kept apart so a login burst
+        # can't hold the admin slots
+        "login": 4,
+        "background": 2,
+    }
+    ADMISSION_ROUTES: list[list[str]] = [
+        ["POST", "/user/enquiry", "checkout"],
+        ["*", "/user/cart", "cart"],
+        ["*", "/admin/export", "background"],
+        ["POST", "/admin/products/import", "background"],
+        ["POST", "/admin/login", "login"],
+        ["*", "/admin", "admin"],
+        ["*", "/user", "browse"],
+    ]
+    ADMISSION_DEFAULT_CLASS: str | None = None
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+
     class Config:
         env_file = ".env"
 
@@ -1,8 +1,6 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import  JWTError
 from sqlalchemy.orm import Session
-from jose import jwt
 
 from app.db.session import get_db
 from app.models.admin_users import AdminUser
@@ -35,15 +33,41 @@ security = HTTPBearer()
 
 #     return admin
 
+from dataclasses import dataclass
 from fastapi import Request
 from fastapi import Depends, HTTPException, Header
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.invalidation import on_invalidate
 from app.core.security import decode_token
-from jose import ExpiredSignatureError, JWTError
+
+
+@dataclass(frozen=True)
+class AdminPrincipal:
+    admin_id: str
+    role: str
+    is_super_admin: bool
+    is_active: bool
+
+
+admin_principal_cache = TTLCache(
+    maxsize=settings.ADMIN_CACHE_MAX_SIZE,
+    ttl=settings.ADMIN_CACHE_TTL_SECONDS
+)
+
+@on_invalidate("admin")
+def invalidate_admin_principal(admin_id: str | None):
+    if admin_id is None:
+        admin_principal_cache.clear()
+    else:
+        admin_principal_cache.pop(admin_id)
 
 def get_current_admin(
     request: Request,
     db: Session = Depends(get_db)
 ):
+    from jose import ExpiredSignatureError, JWTError
+
     token = request.cookies.get("admin_token")
 
     if not token:
@@ -64,17 +88,35 @@ def get_current_admin(
     except JWTError:
         raise HTTPException(401, "Invalid session")
 
-    admin = db.query(AdminUser).filter(
+    # The session only opens a connection on first use, so a cache hit
+    # authenticates without touching the database
+    admin = admin_principal_cache.get(admin_id)
+    if admin:
+        return admin
+
+    row = db.query(
+        AdminUser.admin_id,
+        AdminUser.role,
+        AdminUser.is_super_admin,
+        AdminUser.is_active
+    ).filter(
         AdminUser.admin_id == admin_id,
         AdminUser.is_active == True
     ).first()
 
-    if not admin:
+    if not row:
         raise HTTPException(
             status_code=401,
             detail="Admin not found or inactive"
         )
 
+    admin = AdminPrincipal(
+        admin_id=row.admin_id,
+        role=row.role,
+        is_super_admin=bool(row.is_super_admin),
+        is_active=bool(row.is_active)
+    )
+    admin_principal_cache.set(admin_id, admin)
     return admin
 
 
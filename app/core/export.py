@@ -0,0 +1,52 @@
+import csv
+import io
+
+from app.db.session import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+# Leading characters a spreadsheet reads as the start of a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _escape_cell(value):
+    # Customer-entered text (names, addresses, notes) must not run as a
+    # formula when an admin opens the export in Excel or Sheets
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def stream_csv(header: list[str], statement, to_row, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yield a CSV export chunk by chunk.
+
+    statement is the select() to export and to_row is called with the
+    entities of each result row. The statement runs with yield_per so
+    psycopg2 uses a server-side cursor and only one batch of rows is
+    held in memory at a time. The generator owns its session
+    because StreamingResponse keeps iterating after the request
+    dependencies (and their get_db session) have been torn down.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(header)
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate(0)
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(statement.execution_options(yield_per=batch_size))
+        for count, row in enumerate(rows, start=1):
+            writer.writerow([_escape_cell(value) for value in to_row(*row)])
+            if count % batch_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
@@ -0,0 +1,166 @@
+import os
+import time
+from collections import defaultdict
+
+from starlette.routing import Match
+
+from app.core.metrics import DEFAULT_BUCKETS, Histogram
+
+# Bytes; from an empty 204 up to large exports
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+UNMATCHED = "<unmatched>"
+
+
+class HTTPMetrics:
+    """
+    Per-route request metrics for this worker.
+
+    Only the event loop thread updates and renders them (the middleware
+    never awaits in between reading and writing a value, and /metrics is
+    an async handler), so nothing here takes a lock. Routes are labelled
+    by their template (/user/products/{product_id}) so the label set
+    stays bounded.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.latency = defaultdict(lambda: Histogram(DEFAULT_BUCKETS, thread_safe=False))
+        self.request_size = defaultdict(lambda: Histogram(SIZE_BUCKETS, thread_safe=False))
+        self.response_size = defaultdict(lambda: Histogram(SIZE_BUCKETS, thread_safe=False))
+        self.responses = defaultdict(int)
+        self.in_flight = defaultdict(int)
+
+    def observe(self, key, status, seconds, request_bytes, response_bytes):
+        self.latency[key].observe(seconds)
+        self.request_size[key].observe(request_bytes)
+        self.response_size[key].observe(response_bytes)
+        self.responses[key + (str(status),)] += 1
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+
+        def labels(method, route, **extra):
+            pairs = {"method": method, "route": route, **extra}
+            return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items())
+
+        def histogram(name, help_text, series):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, route), h in sorted(series.items()):
+                seen = 0
+                for bound, n in zip(h.buckets + (float("inf"),), h.counts):
+                    seen += n
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f"{name}_bucket{{{labels(method, route, le=le)}}} {seen}")
+                lines.append(f"{name}_sum{{{labels(method, route)}}} {h.sum}")
+                lines.append(f"{name}_count{{{labels(method, route)}}} {h.count}")
+
+        histogram("http_request_duration_seconds", "Request latency by route template.", self.latency)
+        histogram("http_request_size_bytes", "Request body size by route template.", self.request_size)
+        histogram("http_response_size_bytes", "Response body size by route template.", self.response_size)
+
+        lines.append("# HELP http_responses_total Responses by route template and status code.")
+        lines.append("# TYPE http_responses_total counter")
+        for (method, route, status), n in sorted(self.responses.items()):
+            lines.append(f"http_responses_total{{{labels(method, route, status=status)}}} {n}")
+
+        lines.append("# HELP http_requests_in_flight Requests currently being served.")
+        lines.append("# TYPE http_requests_in_flight gauge")
+        for (method, route), n in sorted(self.in_flight.items()):
+            lines.append(f"http_requests_in_flight{{{labels(method, route)}}} {n}")
+
+        lines.append("# HELP process_start_time_seconds Start time of this worker.")
+        lines.append("# TYPE process_start_time_seconds gauge")
+        lines.append(f'process_start_time_seconds{{pid="{os.getpid()}"}} {self.started_at}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+http_metrics = HTTPMetrics()
+
+
+class HTTPMetricsMiddleware:
+    """
+    Record latency, body sizes, status and in-flight count per route
+    template. The template is matched up front (cached per concrete
+    path) so the in-flight gauge is labelled before the handler runs.
+    """
+
+    MAX_CACHED_PATHS = 4096
+
+    def __init__(self, app, router, metrics: HTTPMetrics = http_metrics):
+        self.app = app
+        self.router = router
+        self.metrics = metrics
+        self._routes = None
+        self._templates = {}
+
+    @staticmethod
+    def _flatten(routes):
+        # Newer FastAPI keeps included routers as nested route groups
+        flat = []
+        for route in routes:
+            if hasattr(route, "effective_route_contexts"):
+                flat.extend(route.effective_route_contexts())
+            else:
+                flat.append(route)
+        return flat
+
+    def _template(self, scope):
+        key = (scope["method"], scope["path"])
+        template = self._templates.get(key)
+        if template is None:
+            if self._routes is None:
+                # Routers are included after the middleware is added
+                self._routes = self._flatten(self.router.routes)
+
+            template = UNMATCHED
+            for route in self._routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    template = route.path
+                    break
+                if match == Match.PARTIAL and template == UNMATCHED:
+                    template = route.path
+            if len(self._templates) >= self.MAX_CACHED_PATHS:
+                self._templates.clear()
+            self._templates[key] = template
+        return template
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        key = (scope["method"], self._template(scope))
+        started = time.perf_counter()
+        request_bytes = 0
+        response_bytes = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight[key] += 1
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            self.metrics.in_flight[key] -= 1
+            self.metrics.observe(key, status, time.perf_counter() - started, request_bytes, response_bytes)
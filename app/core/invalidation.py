@@ -0,0 +1,130 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+
+# NOTIFY payloads are capped at 8000 bytes; bigger id lists are sent as
+# "everything of this entity" instead
+MAX_NOTIFY_IDS = 200
+
+_handlers = defaultdict(list)
+
+
+def on_invalidate(entity: str):
+    """
+    Register fn(entity_id) to run when `entity` changes on any worker.
+    entity_id is None when the whole entity (or everything) must be
+    dropped, e.g. after a bulk change or a listener reconnect.
+    """
+    def register(fn):
+        _handlers[entity].append(fn)
+        return fn
+    return register
+
+
+def notify_change(db, entity: str, ids=None):
+    """
+    Queue an invalidation for `entity` in the current transaction.
+    Postgres only delivers it once the transaction commits, so a rolled
+    back write never evicts anything.
+    """
+    if db.bind.dialect.name != "postgresql":
+        # No LISTEN/NOTIFY (SQLite dev setups): single process, evict now
+        dispatch(entity, ids)
+        return
+
+    if isinstance(ids, str):
+        ids = [ids]
+    if ids is not None and len(ids) > MAX_NOTIFY_IDS:
+        ids = None
+
+    db.execute(
+        text("SELECT pg_notify(:channel, :payload)"),
+        {"channel": CHANNEL, "payload": json.dumps({"entity": entity, "ids": ids})}
+    )
+
+
+async def notify_change_async(db, entity: str, ids=None):
+    """notify_change for an AsyncSession."""
+    await db.run_sync(notify_change, entity, ids)
+
+
+def dispatch(entity: str | None, ids=None):
+    if isinstance(ids, str):
+        ids = [ids]
+
+    entities = [entity] if entity else list(_handlers)
+    for name in entities:
+        for fn in _handlers.get(name, []):
+            try:
+                if ids is None:
+                    fn(None)
+                else:
+                    for entity_id in ids:
+                        fn(entity_id)
+            except Exception:
+                logger.exception("Cache invalidation handler failed for %s", name)
+
+
+def _on_notification(connection, pid, channel, payload):
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning("Ignoring malformed invalidation payload: %r", payload)
+        return
+    dispatch(message.get("entity"), message.get("ids"))
+
+
+def _listener_dsn(url: str):
+    url = make_url(url)
+    return url.set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+async def listen_for_invalidations():
+    """
+    Hold a dedicated asyncpg connection LISTENing on CHANNEL for the life
+    of the worker. Anything missed while disconnected is unknown, so
+    every (re)connect drops all registered caches.
+    """
+    import asyncpg
+
+    dsn = _listener_dsn(settings.DATABASE_URL)
+    delay = 1
+
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn)
+            await connection.add_listener(CHANNEL, _on_notification)
+            dispatch(None)
+            delay = 1
+
+            while not connection.is_closed():
+                await asyncio.sleep(settings.CACHE_INVALIDATION_HEARTBEAT_SECONDS)
+                await connection.execute("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Cache invalidation listener disconnected: %s", e)
+        finally:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 30)
+
+
+def invalidation_enabled():
+    return (
+        settings.CACHE_INVALIDATION_ENABLED
+        and make_url(settings.DATABASE_URL).get_backend_name() in ("postgres", "postgresql")
+    )
@@ -0,0 +1,133 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from app.core.config import settings
+
+# Attributes every LogRecord has; anything else came in through extra=
+RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Uvicorn installs its own stderr handlers; they go through ours instead
+UVICORN_LOGGERS = ["uvicorn", "uvicorn.access"]
+
+_listener = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, message, then extra= fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    At most `per_minute` records per (logger, level, message template) in
+    each one-minute window. The first record let through in the next
+    window carries the number dropped as "suppressed".
+    """
+
+    MAX_KEYS = 10_000
+
+    def __init__(self, per_minute: int, exempt=()):
+        super().__init__()
+        self.per_minute = per_minute
+        self.exempt = set(exempt)
+        self.windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not self.per_minute or record.name in self.exempt:
+            return True
+
+        key = (record.name, record.levelno, str(record.msg))
+        window = int(time.monotonic() // 60)
+        with self._lock:
+            state = self.windows.get(key)
+            if state is None or state[0] != window:
+                if len(self.windows) >= self.MAX_KEYS:
+                    self.windows.clear()
+                suppressed = state[2] if state else 0
+                state = self.windows[key] = [window, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if state[1] >= self.per_minute:
+                state[2] += 1
+                return False
+            state[1] += 1
+        return True
+
+
+class _QueueHandler(QueueHandler):
+    # The stock prepare() renders the record with this handler's (plain)
+    # formatter; keep it structured and leave formatting to the listener,
+    # resolving only what must happen on the calling thread
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """
+    Route all logging through a queue drained by a background listener,
+    so request handlers only pay for an enqueue. Levels come from
+    LOG_LEVEL plus per-logger LOG_LEVELS overrides. Safe to call twice.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(sys.stdout)
+        if settings.LOG_FORMAT == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+        records = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        handler.addFilter(RateLimitFilter(settings.LOG_RATE_LIMIT_PER_MINUTE, settings.LOG_RATE_LIMIT_EXEMPT))
+
+        root = logging.getLogger()
+        for existing in root.handlers[:]:
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(settings.LOG_LEVEL.upper())
+
+        for name in UVICORN_LOGGERS:
+            uvicorn_logger = logging.getLogger(name)
+            uvicorn_logger.handlers.clear()
+            uvicorn_logger.propagate = True
+
+        for name, level in settings.LOG_LEVELS.items():
+            logging.getLogger(name).setLevel(level.upper())
+
+        _listener = QueueListener(records, output)
+        _listener.start()
+        atexit.register(_listener.stop)
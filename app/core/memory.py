@@ -0,0 +1,244 @@
+import itertools
+import linecache
+import resource
+import threading
+import tracemalloc
+from collections import deque
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.http_metrics import UNMATCHED
+
+# Snapshots and diffs would dominate the per-route peaks
+DIAGNOSTICS_PATH = "/admin/diagnostics/memory"
+
+GROUP_BY = ("lineno", "filename", "traceback")
+
+# tracemalloc's own bookkeeping and the import machinery drown out app code
+SNAPSHOT_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return pages * resource.getpagesize()
+
+
+class RouteMemory:
+    # Worst and running total of traced peak above the request's starting point
+    __slots__ = ("requests", "peak_max", "peak_total")
+
+    def __init__(self):
+        self.requests = 0
+        self.peak_max = 0
+        self.peak_total = 0
+
+
+class MemoryDiagnostics:
+    """
+    Runtime switch for tracemalloc plus the snapshots taken while it runs.
+
+    Tracing is off until a super admin starts it and only covers this
+    worker. While it is on every allocation is slower and uses more
+    memory (about `frames` stack frames per traced block), so stop it
+    once the snapshots you need are taken; stopping drops the traces but
+    keeps the snapshots for diffing.
+    """
+
+    def __init__(self, frames: int, keep: int):
+        self.frames = frames
+        self.snapshots = deque(maxlen=keep)
+        self.routes = {}
+        self.started_at = None
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def start(self, frames: int | None = None):
+        with self._lock:
+            if tracemalloc.is_tracing():
+                raise HTTPException(409, "Memory tracing is already running")
+            tracemalloc.start(frames or self.frames)
+            self.routes = {}
+            self.started_at = datetime.now(timezone.utc).isoformat()
+
+    def stop(self):
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                raise HTTPException(409, "Memory tracing is not running")
+            tracemalloc.stop()
+            self.started_at = None
+
+    def status(self):
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "started_at": self.started_at,
+            "frames": tracemalloc.get_traceback_limit() if tracing else self.frames,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "rss_bytes": _rss_bytes(),
+            "snapshots": [self._describe(s) for s in self.snapshots]
+        }
+
+    def take_snapshot(self):
+        if not tracemalloc.is_tracing():
+            raise HTTPException(409, "Start memory tracing before taking snapshots")
+        snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        entry = {
+            "id": next(self._ids),
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+            "traced_bytes": tracemalloc.get_traced_memory()[0],
+            "rss_bytes": _rss_bytes(),
+            "snapshot": snapshot
+        }
+        with self._lock:
+            self.snapshots.append(entry)
+        return self._describe(entry)
+
+    @staticmethod
+    def _describe(entry):
+        return {k: v for k, v in entry.items() if k != "snapshot"}
+
+    def _get(self, snapshot_id: int | None):
+        if not self.snapshots:
+            raise HTTPException(404, "No snapshots taken")
+        if snapshot_id is None:
+            return self.snapshots[-1]
+        for entry in self.snapshots:
+            if entry["id"] == snapshot_id:
+                return entry
+        raise HTTPException(404, f"Snapshot {snapshot_id} not found (only the last {self.snapshots.maxlen} are kept)")
+
+    @staticmethod
+    def _check_group_by(group_by: str):
+        if group_by not in GROUP_BY:
+            raise HTTPException(400, f"group_by must be one of {', '.join(GROUP_BY)}")
+
+    @staticmethod
+    def _site(stat):
+        frames = stat.traceback.format(most_recent_first=True)
+        return {
+            "site": str(stat.traceback[0]),
+            "traceback": frames if len(stat.traceback) > 1 else None
+        }
+
+    def top(self, snapshot_id: int | None = None, group_by: str = "lineno", limit: int = 25):
+        """Largest allocation sites in one snapshot (the latest by default)."""
+        self._check_group_by(group_by)
+        entry = self._get(snapshot_id)
+        stats = entry["snapshot"].statistics(group_by)
+        return {
+            "snapshot": self._describe(entry),
+            "group_by": group_by,
+            "total_bytes": sum(stat.size for stat in stats),
+            "sites": [
+                {**self._site(stat), "size_bytes": stat.size, "count": stat.count}
+                for stat in stats[:limit]
+            ]
+        }
+
+    def diff(self, base: int, compare: int | None = None, group_by: str = "lineno", limit: int = 25):
+        """Sites that grew the most between two snapshots; leaks sit at the top."""
+        self._check_group_by(group_by)
+        base_entry = self._get(base)
+        compare_entry = self._get(compare)
+        stats = compare_entry["snapshot"].compare_to(base_entry["snapshot"], group_by)
+        return {
+            "base": self._describe(base_entry),
+            "compare": self._describe(compare_entry),
+            "group_by": group_by,
+            "size_diff_bytes": sum(stat.size_diff for stat in stats),
+            "sites": [
+                {
+                    **self._site(stat),
+                    "size_bytes": stat.size,
+                    "size_diff_bytes": stat.size_diff,
+                    "count": stat.count,
+                    "count_diff": stat.count_diff
+                }
+                for stat in stats[:limit]
+            ]
+        }
+
+    def clear_snapshots(self):
+        with self._lock:
+            self.snapshots.clear()
+
+    def record_route(self, key, peak_bytes: int):
+        route = self.routes.get(key)
+        if route is None:
+            route = self.routes[key] = RouteMemory()
+        route.requests += 1
+        route.peak_total += peak_bytes
+        route.peak_max = max(route.peak_max, peak_bytes)
+
+    def route_peaks(self, limit: int = 50):
+        rows = [
+            {
+                "method": method,
+                "route": route,
+                "requests": m.requests,
+                "peak_max_bytes": m.peak_max,
+                "peak_avg_bytes": m.peak_total // m.requests
+            }
+            for (method, route), m in list(self.routes.items())
+        ]
+        rows.sort(key=lambda row: row["peak_max_bytes"], reverse=True)
+        return {"tracing": tracemalloc.is_tracing(), "routes": rows[:limit]}
+
+
+memory_diagnostics = MemoryDiagnostics(
+    frames=settings.MEMORY_TRACE_FRAMES,
+    keep=settings.MEMORY_SNAPSHOTS_KEPT
+)
+
+
+class MemoryTrackingMiddleware:
+    """
+    Per-route peak traced memory while tracemalloc is running; a single
+    is_tracing() check otherwise. tracemalloc only has one process-wide
+    peak, so it is reset when a request starts with nothing else in
+    flight, and a request's figure is the peak above what was traced
+    when it started. Overlapping requests share that peak, so under
+    concurrency the numbers are an upper bound.
+    """
+
+    def __init__(self, app, diagnostics: MemoryDiagnostics = memory_diagnostics):
+        self.app = app
+        self.diagnostics = diagnostics
+        self.in_flight = 0
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not tracemalloc.is_tracing()
+            or scope["path"].startswith(DIAGNOSTICS_PATH)
+        ):
+            return await self.app(scope, receive, send)
+
+        if self.in_flight == 0:
+            tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            # Tracing may have been stopped mid-request
+            if tracemalloc.is_tracing():
+                route = getattr(scope.get("route"), "path", None) or UNMATCHED
+                peak = tracemalloc.get_traced_memory()[1]
+                self.diagnostics.record_route((scope["method"], route), max(peak - start, 0))
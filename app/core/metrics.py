@@ -0,0 +1,59 @@
+import bisect
+import threading
+
+# Seconds; spans sub-millisecond cache hits up to pool timeouts
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram (cumulative on export, like Prometheus).
+    thread_safe=False drops the lock for owners that only ever touch it
+    from one thread (the event loop).
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, thread_safe: bool = True):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock() if thread_safe else None
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if self._lock is None:
+            self._add(index, value)
+        else:
+            with self._lock:
+                self._add(index, value)
+
+    def _add(self, index: int, value: float):
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float):
+        # Upper bound of the bucket holding the q-th observation
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        cumulative = []
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            cumulative.append([str(bound) if bound != float("inf") else "+Inf", seen])
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": cumulative
+        }
@@ -0,0 +1,235 @@
+import asyncio
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.dependencies import get_current_admin
+from app.db.session import SessionLocal
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY = "__profile"
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SamplingProfiler:
+    """
+    Stack sampler for a single request.
+
+    A background thread snapshots sys._current_frames() every `interval`
+    seconds. Event loop samples only count while the request's own task
+    is running; worker thread samples (sync routes, run_in_threadpool)
+    count when they are inside app code, so other requests running app
+    code in the threadpool at the same moment can show up too.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.task = asyncio.current_task()
+        self.frames = {}
+        self.samples = []
+        self.weights = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id == self.loop_thread:
+                    if asyncio.current_task(self.loop) is not self.task:
+                        continue
+                elif not self._in_app(frame):
+                    continue
+                self.samples.append(self._stack(frame))
+                self.weights.append(now - last)
+            last = now
+
+    @staticmethod
+    def _in_app(frame):
+        while frame is not None:
+            if frame.f_code.co_filename.startswith(APP_DIR):
+                return True
+            frame = frame.f_back
+        return False
+
+    def _stack(self, frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_qualname, code.co_filename, code.co_firstlineno)
+            index = self.frames.get(key)
+            if index is None:
+                index = self.frames[key] = len(self.frames)
+            stack.append(index)
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def speedscope(self, name: str):
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "exporter": settings.PROJECT_NAME,
+            "shared": {
+                "frames": [
+                    {"name": qualname, "file": filename, "line": line}
+                    for qualname, filename, line in self.frames
+                ]
+            },
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": self.samples,
+                "weights": self.weights
+            }]
+        }
+
+
+class ProfileStore:
+    """Speedscope files in PROFILE_DIR, newest PROFILE_MAX_FILES kept."""
+
+    SUFFIX = ".speedscope.json"
+    NAME_RE = re.compile(r"^[\w.-]+$")
+
+    def __init__(self, directory: str, max_files: int):
+        self.directory = directory
+        self.max_files = max_files
+
+    def new_name(self, method: str, path: str):
+        slug = re.sub(r"[^\w]+", "-", path).strip("-") or "root"
+        return f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{method}-{slug}"[:150] + self.SUFFIX
+
+    def save(self, name: str, method: str, path: str, status, profiler: SamplingProfiler):
+        os.makedirs(self.directory, exist_ok=True)
+
+        data = profiler.speedscope(f"{method} {path}")
+        data["metadata"] = {
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(profiler.duration * 1000, 1),
+            "samples": len(profiler.samples),
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        with open(os.path.join(self.directory, name), "w") as f:
+            json.dump(data, f)
+
+        self._prune()
+        return name
+
+    def _files(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted((f for f in os.listdir(self.directory) if f.endswith(self.SUFFIX)), reverse=True)
+
+    def _prune(self):
+        for name in self._files()[self.max_files:]:
+            os.remove(os.path.join(self.directory, name))
+
+    def path(self, name: str):
+        if not self.NAME_RE.match(name) or not name.endswith(self.SUFFIX):
+            raise HTTPException(400, "Invalid profile name")
+        path = os.path.join(self.directory, name)
+        if not os.path.isfile(path):
+            raise HTTPException(404, "Profile not found")
+        return path
+
+    def list(self):
+        profiles = []
+        for name in self._files():
+            with open(os.path.join(self.directory, name)) as f:
+                metadata = json.load(f).get("metadata", {})
+            profiles.append({"name": name, **metadata})
+        return profiles
+
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_FILES)
+
+
+def _profiling_requested(scope):
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER and value not in (b"", b"0", b"false"):
+            return True
+    query = scope.get("query_string", b"")
+    return PROFILE_QUERY.encode() in query and parse_qs(query.decode()).get(PROFILE_QUERY, ["0"])[0] not in ("", "0", "false")
+
+
+def _is_super_admin(scope):
+    db = SessionLocal()
+    try:
+        return get_current_admin(Request(scope), db).role == "super_admin"
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+class ProfilingMiddleware:
+    """
+    Run a request under SamplingProfiler when a super admin asks for it
+    with an "X-Profile: 1" header or "?__profile=1". Everyone else, and
+    every request without the flag, goes straight through. The stored
+    profile's name is returned in the X-Profile-Id header.
+    """
+
+    def __init__(self, app, interval: float, store: ProfileStore = profile_store):
+        self.app = app
+        self.interval = interval
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profiling_requested(scope):
+            return await self.app(scope, receive, send)
+
+        if not await run_in_threadpool(_is_super_admin, scope):
+            return await self.app(scope, receive, send)
+
+        name = self.store.new_name(scope["method"], scope["path"])
+        status = None
+
+        async def send_with_profile(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", name.encode())]}
+            await send(message)
+
+        profiler = SamplingProfiler(self.interval)
+        try:
+            with profiler:
+                await self.app(scope, receive, send_with_profile)
+        finally:
+            await run_in_threadpool(
+                self.store.save, name, scope["method"], scope["path"], status, profiler
+            )
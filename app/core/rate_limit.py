@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import OrderedDict
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+# Set by the storefront (app.routes.user_routes.get_user_session)
+SESSION_COOKIE = "session_id"
+
+
+class TokenBucketLimiter:
+    """
+    In-memory token buckets keyed by client (IP, username, session...).
+
+    Each key may burst up to `capacity` requests and refills at `rate`
+    tokens per second. Buckets live per worker process; the least
+    recently seen keys are dropped beyond `max_keys`.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.rejected = 0
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            else:
+                self.rejected += 1
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed
+
+    def retry_after(self, cost: float = 1.0) -> int:
+        # Worst case wait for an empty bucket to refill one request
+        return max(1, int(cost / self.rate + 0.999))
+
+    def stats(self):
+        return {"keys": len(self._buckets), "rejected": self.rejected}
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-client token buckets by route group.
+
+    groups maps a path prefix to (rate, burst); each group has its own
+    buckets keyed by the storefront session cookie when there is one
+    and by client IP otherwise. Session buckets also charge a per-IP
+    bucket sessions_per_ip times as large, so shoppers behind one NAT
+    get their own limits but minting cookies can't buy unlimited ones.
+    Before a bucket is charged, requests are
+    shed with a fast 503 when max_in_flight limited requests are already
+    running or is_saturated() reports the DB pool is exhausted, instead
+    of queueing until they time out.
+    """
+
+    def __init__(self, app, groups: dict, max_in_flight: int, is_saturated=None, sessions_per_ip: int = 20):
+        self.app = app
+        self.groups = sorted(
+            (
+                (
+                    prefix,
+                    TokenBucketLimiter(rate=rate, capacity=burst),
+                    TokenBucketLimiter(rate=rate * sessions_per_ip, capacity=burst * sessions_per_ip)
+                )
+                for prefix, (rate, burst) in groups.items()
+            ),
+            key=lambda group: len(group[0]),
+            reverse=True
+        )
+        self.max_in_flight = max_in_flight
+        self.is_saturated = is_saturated
+        self.in_flight = 0
+        self.shed = 0
+
+    def limiters_for(self, path: str):
+        for prefix, limiter, ip_limiter in self.groups:
+            if path.startswith(prefix):
+                return limiter, ip_limiter
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limiters = self.limiters_for(scope["path"])
+        if limiters is None:
+            return await self.app(scope, receive, send)
+        limiter, ip_limiter = limiters
+
+        if self.in_flight >= self.max_in_flight or (self.is_saturated and self.is_saturated()):
+            self.shed += 1
+            return await self.reject(scope, receive, send, 503, "Server busy, retry shortly", 1)
+
+        request = Request(scope)
+        ip = client_ip(request) or "unknown"
+        session_id = request.cookies.get(SESSION_COOKIE)
+        if session_id:
+            if not ip_limiter.allow(ip):
+                return await self.reject(scope, receive, send, 429, "Too many requests", ip_limiter.retry_after())
+            key = f"session:{session_id}"
+        else:
+            key = ip
+        if not limiter.allow(key):
+            return await self.reject(scope, receive, send, 429, "Too many requests", limiter.retry_after())
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+
+    async def reject(self, scope, receive, send, status_code: int, detail: str, retry_after: int):
+        response = JSONResponse(
+            {"detail": detail},
+            status_code=status_code,
+            headers={"Retry-After": str(retry_after)}
+        )
+        await response(scope, receive, send)
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "shed": self.shed,
+            "groups": {
+                prefix: {**limiter.stats(), "per_ip": ip_limiter.stats()}
+                for prefix, limiter, ip_limiter in self.groups
+            }
+        }
+
+
+def client_ip(request: Request):
+    """
+    The caller's address for rate limits and logs. X-Forwarded-For is
+    only believed for the TRUSTED_PROXY_HOPS entries our own proxies
+    appended on the right; anything left of those is client supplied
+    and can't be used as a key.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        xff = [ip.strip() for ip in request.headers.get("x-forwarded-for", "").split(",") if ip.strip()]
+        if len(xff) >= hops:
+            return xff[-hops]
+    return request.client.host if request.client else None
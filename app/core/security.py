@@ -1,22 +1,83 @@
-from passlib.context import CryptContext
-from jose import jwt, JWTError, ExpiredSignatureError
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from app.core.config import settings
 
 ALGORITHM = "HS256"
 SECRET_KEY = "CHANGE_THIS_SECRET"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# passlib/bcrypt and jose are imported on first use to keep them off the
+# startup path
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def hash_password(password: str) -> str:
     if len(password.encode("utf-8")) > 72:
-        print(password)
         raise ValueError("Password too long (max 72 bytes)")
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 def verify_password(password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(password, hashed_password)
+    return get_pwd_context().verify(password, hashed_password)
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+class PasswordWorkerPool:
+    """
+    Bounded executor for bcrypt work.
+
+    Each hash/verify burns tens of ms of CPU, so it gets a few dedicated
+    threads instead of AnyIO's shared request threadpool. When more than
+    max_pending calls are queued, new ones fail fast with
+    PasswordPoolBusy. Counters are only touched from the event loop.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PasswordPoolBusy()
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "queued": max(0, self.pending - self.workers),
+            "completed": self.completed,
+            "rejected": self.rejected
+        }
+
+
+password_pool = PasswordWorkerPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_pool.run(hash_password, password)
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await password_pool.run(verify_password, password, hashed_password)
 
 def decode_token(token: str) -> dict:
+    from jose import jwt
     return jwt.decode(
         token,
         SECRET_KEY,
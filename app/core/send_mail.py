@@ -1,19 +1,29 @@
 
-import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
+from functools import lru_cache
 from app.core.config import settings
 import logging
 
-# Configure API key
-configuration = sib_api_v3_sdk.Configuration()
-configuration.api_key["api-key"] = settings.BREVO_API_KEY
 
-api_instance = sib_api_v3_sdk.TransactionalEmailsApi(
-    sib_api_v3_sdk.ApiClient(configuration)
-)
+@lru_cache(maxsize=None)
+def get_email_api():
+    # sib_api_v3_sdk is a large generated client that takes a noticeable
+    # share of startup to import, so it is loaded on first use (or by the
+    # startup warm-up) rather than when the app is imported
+    import sib_api_v3_sdk
+
+    configuration = sib_api_v3_sdk.Configuration()
+    configuration.api_key["api-key"] = settings.BREVO_API_KEY
+
+    return sib_api_v3_sdk.TransactionalEmailsApi(
+        sib_api_v3_sdk.ApiClient(configuration)
+    )
 
 
 def send_mail(to_email: str, subject: str, html_content: str):
+    api_instance = get_email_api()
+    import sib_api_v3_sdk
+    from sib_api_v3_sdk.rest import ApiException
+
     try:
         email = sib_api_v3_sdk.SendSmtpEmail(
             to=[{"email": to_email}],
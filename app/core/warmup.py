@@ -0,0 +1,127 @@
+import asyncio
+import importlib
+import logging
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import configure_mappers
+
+from app.core.catalog_snapshot import current_catalog
+from app.core.config import settings
+from app.core.security import get_pwd_context
+from app.core.send_mail import get_email_api
+from app.db.async_session import AsyncSessionLocal, async_engine
+from app.db.session import SessionLocal, engine
+from app.models.admin_users import AdminUser
+from app.models.brand import Brand
+from app.models.cart import Cart
+from app.models.categories import Category
+from app.models.products import Product
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}
+        self.errors = {}
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps_ms": self.steps,
+            "errors": self.errors
+        }
+
+
+warmup_state = WarmupState()
+
+
+# Same shapes as the storefront / auth queries; executing them once fills
+# each engine's compiled statement cache
+HOT_STATEMENTS = [
+    lambda: select(Category).where(Category.is_active == True),
+    lambda: select(Brand).where(Brand.is_active == True),
+    lambda: select(Product).where(Product.product_id == "", Product.is_active == True),
+    lambda: select(Product).where(Product.category_id == "", Product.is_active == True),
+    lambda: select(Product).where(Product.brand_id == "", Product.is_active == True),
+    lambda: select(Cart).where(Cart.session_id == "", Cart.product_id == ""),
+    lambda: select(Cart, Product).join(Product, Cart.product_id == Product.product_id).where(Cart.session_id == ""),
+]
+
+
+def _open_sync_connections(n: int):
+    connections = [engine.connect() for _ in range(n)]
+    for connection in connections:
+        connection.close()
+
+
+async def _open_async_connections(n: int):
+    connections = await asyncio.gather(*(async_engine.connect() for _ in range(n)))
+    await asyncio.gather(*(connection.close() for connection in connections))
+
+
+def _compile_sync_statements():
+    # get_current_admin's principal lookup
+    with SessionLocal() as db:
+        db.query(
+            AdminUser.admin_id,
+            AdminUser.role,
+            AdminUser.is_super_admin,
+            AdminUser.is_active
+        ).filter(
+            AdminUser.admin_id == "",
+            AdminUser.is_active == True
+        ).first()
+
+
+async def _compile_async_statements():
+    async with AsyncSessionLocal() as db:
+        for statement in HOT_STATEMENTS:
+            (await db.execute(statement())).all()
+
+
+async def _wait_for_catalog():
+    deadline = time.monotonic() + settings.WARMUP_CATALOG_TIMEOUT_SECONDS
+    while current_catalog() is None and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+
+
+async def warm_up():
+    """
+    Do the first-request work up front: mappers, pool connections,
+    statement compilation and the catalog snapshot. A failing step is
+    logged and skipped; it only costs the first request its latency.
+    """
+    n = min(settings.WARMUP_POOL_CONNECTIONS, settings.DB_POOL_SIZE)
+    steps = [
+        ("mappers", lambda: asyncio.to_thread(configure_mappers)),
+        ("sync_pool", lambda: asyncio.to_thread(_open_sync_connections, n)),
+        ("async_pool", lambda: _open_async_connections(n)),
+        ("sync_statements", lambda: asyncio.to_thread(_compile_sync_statements)),
+        ("async_statements", _compile_async_statements),
+        ("catalog", _wait_for_catalog),
+        # Deferred imports, loaded here off the request path
+        ("password_hashing", lambda: asyncio.to_thread(get_pwd_context)),
+        ("jwt", lambda: asyncio.to_thread(importlib.import_module, "jose.jwt")),
+        ("email_client", lambda: asyncio.to_thread(get_email_api)),
+    ]
+
+    warmup_state.started_at = time.time()
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            await step()
+        except Exception as e:
+            logger.warning("Warm-up step %s failed: %s", name, e)
+            warmup_state.errors[name] = str(e)
+        warmup_state.steps[name] = round((time.perf_counter() - started) * 1000, 1)
+
+    warmup_state.finished_at = time.time()
+    warmup_state.ready = True
+    logger.info("Warm-up finished in %s ms", sum(warmup_state.steps.values()))
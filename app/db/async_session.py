@@ -0,0 +1,67 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, instrument_pool, timed_pool_class
+from app.db.query_stats import instrument_queries
+from app.db.routing import routing_session_class
+from app.db.session import pool_options
+
+
+def async_database_url(url: str):
+    """
+    Derive the asyncpg URL from DATABASE_URL (postgres://, postgresql://
+    or postgresql+psycopg2://). asyncpg spells sslmode as ssl. A SQLite
+    file (benchmarks, local runs) goes through aiosqlite.
+    """
+    url = make_url(url)
+    if url.drivername in ("sqlite", "sqlite+pysqlite"):
+        return url.set(drivername="sqlite+aiosqlite")
+    if url.drivername in ("postgres", "postgresql") or url.drivername.startswith("postgresql+"):
+        url = url.set(drivername="postgresql+asyncpg")
+        if "sslmode" in url.query:
+            query = dict(url.query)
+            query["ssl"] = query.pop("sslmode")
+            url = url.set(query=query)
+    return url
+
+
+connect_args = {}
+if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+    connect_args["server_settings"] = {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+
+async_pool_metrics = PoolMetrics()
+
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL),
+    poolclass=timed_pool_class(AsyncAdaptedQueuePool, async_pool_metrics),
+    connect_args=connect_args,
+    **pool_options
+)
+instrument_pool(async_engine.sync_engine, async_pool_metrics, "async")
+
+async_replica_engines = [
+    create_async_engine(async_database_url(url), connect_args=connect_args, **pool_options)
+    for url in settings.READ_REPLICA_URLS
+]
+for e in [async_engine, *async_replica_engines]:
+    instrument_queries(e.sync_engine)
+
+# expire_on_commit=False: attributes stay readable after commit without
+# an implicit (and in async, illegal) lazy reload
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+    class_=AsyncSession,
+    **({
+        "sync_session_class": routing_session_class(
+            async_engine.sync_engine,
+            [e.sync_engine for e in async_replica_engines]
+        )
+    } if async_replica_engines else {})
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -10,10 +10,20 @@ from app.models.cart import Cart
 from app.models.email_logs import EmailLog
 from app.models.user_visits import UserVisit
 from app.models.admin_activity_logs import AdminActivityLog
+from app.models.brand import Brand
+
+
+def create_missing_indexes():
+    # create_all() skips tables that already exist, so indexes added
+    # to existing models later have to be created one by one.
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
 
 
 def migrate():
     Base.metadata.create_all(bind=engine)
+    create_missing_indexes()
     print("All tables created successfully")
 
 if __name__ == "__main__":
@@ -0,0 +1,246 @@
+"""
+Check that the hot queries still get the plans they were indexed for.
+
+Each check builds one of the app's hot statements with parameters taken
+from the data (the busiest category, a real cart session, a mid-table
+enquiry cursor) and asserts on its EXPLAIN output:
+
+- no sequential scan on a table with at least --min-rows rows, unless
+  the check allows it
+- the expected indexes appear in the plan (skipped when the index's
+  table is too small for the planner to bother)
+- the estimated total cost stays under the check's cap
+
+Run it against a database seeded with app.db.seed_data; it exits 1 on
+any regression and 2 when the data is too small to judge.
+
+    python -m app.db.seed_data --reset --products 200000 --enquiries 50000 --activity-logs 50000
+    python -m app.db.plan_check
+"""
+import argparse
+import json
+from dataclasses import dataclass, field
+from typing import Callable
+
+from sqlalchemy import func, select, text
+
+import app.db.base  # noqa: F401  registers every model
+from app.db import queries
+from app.db.session import engine
+from app.models.admin_activity_logs import AdminActivityLog
+from app.models.cart import Cart
+from app.models.enquiries import Enquiry
+from app.models.enquiry_items import EnquiryItem
+from app.models.products import Product
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    # Returns the statement to explain, given a connection to pick parameters with
+    build: Callable
+    # Each entry must appear in the plan; a tuple means any one of them
+    indexes: tuple = ()
+    max_cost: float | None = None
+    # Large tables this query may still read in full
+    allow_seq_scan: tuple = ()
+    note: str = ""
+
+
+@dataclass
+class PlanResult:
+    name: str
+    cost: float
+    indexes: list
+    seq_scans: list
+    problems: list = field(default_factory=list)
+    note: str = ""
+    plan: dict | None = None
+
+
+def _busiest(conn, column):
+    return conn.scalar(select(column).group_by(column).order_by(func.count().desc()).limit(1))
+
+
+def _middle(conn, model, column):
+    return conn.scalar(select(column).order_by(column).offset(
+        conn.scalar(select(func.count()).select_from(model)) // 2
+    ).limit(1))
+
+
+# The statements come from app.db.queries, which the routes execute;
+# these only pick realistic parameters. Catalog reads normally come from
+# the snapshot; those builders are the DB fallbacks, which the snapshot
+# builder and a missing snapshot rely on.
+
+def category_products(conn):
+    return queries.category_products(_busiest(conn, Product.category_id))
+
+
+def brand_products(conn):
+    return queries.brand_products(_busiest(conn, Product.brand_id))
+
+
+def search(conn):
+    return queries.search_products("notebook")
+
+
+def filter_products(conn):
+    category_ids = conn.scalars(
+        select(Product.category_id).group_by(Product.category_id).order_by(func.count().desc()).limit(3)
+    ).all()
+    return queries.filter_products(category_ids=category_ids, min_price=100, max_price=350)
+
+
+def cart_view(conn):
+    return queries.cart_items(_busiest(conn, Cart.session_id))
+
+
+def activity_logs_page(conn):
+    return queries.activity_logs_page()
+
+
+def activity_logs_admin_page(conn):
+    return queries.activity_logs_page(admin_id=_busiest(conn, AdminActivityLog.admin_id))
+
+
+def enquiries_page(conn):
+    return queries.enquiries_page()
+
+
+def enquiries_cursor_page(conn):
+    return queries.enquiries_page(cursor=(_middle(conn, Enquiry, Enquiry.created_at), 0))
+
+
+def enquiries_status_page(conn):
+    return queries.enquiries_page(status="NEW")
+
+
+def enquiry_items(conn):
+    # The IN query selectinload(Enquiry.items) issues behind each enquiry page
+    ids = conn.scalars(select(Enquiry.id).order_by(Enquiry.created_at.desc()).limit(20)).all()
+    return select(EnquiryItem).where(EnquiryItem.enquiry_id.in_(ids))
+
+
+# Caps leave room for seed_data catalogs up to ~1M products; scale them
+# with --cost-scale beyond that. Paged queries stay flat at any size.
+CHECKS = [
+    PlanCheck("category products", category_products, indexes=("ix_products_category_id",), max_cost=50_000),
+    PlanCheck("brand products", brand_products, indexes=("ix_products_brand_id",), max_cost=50_000),
+    PlanCheck(
+        "search", search, allow_seq_scan=("products",),
+        note="substring match over four columns reads every product until search gets a trigram/full-text index"
+    ),
+    PlanCheck(
+        "filter", filter_products,
+        indexes=(("ix_products_category_id", "ix_products_price"),), max_cost=50_000
+    ),
+    PlanCheck(
+        "cart view", cart_view,
+        indexes=(("ix_cart_session_id", "uq_cart_session_product"), "ix_products_product_id"), max_cost=500
+    ),
+    PlanCheck("activity logs page", activity_logs_page, indexes=("idx_activity_log_created",), max_cost=500),
+    PlanCheck(
+        "activity logs page (admin)", activity_logs_admin_page,
+        indexes=("idx_activity_log_admin_created",), max_cost=500
+    ),
+    PlanCheck("enquiries page", enquiries_page, indexes=("idx_enquiry_created_id",), max_cost=500),
+    PlanCheck("enquiries page (cursor)", enquiries_cursor_page, indexes=("idx_enquiry_created_id",), max_cost=500),
+    PlanCheck(
+        "enquiries page (status)", enquiries_status_page,
+        indexes=("idx_enquiry_status_created_id",), max_cost=500
+    ),
+    PlanCheck("enquiry items", enquiry_items, indexes=("ix_enquiry_items_enquiry_id",), max_cost=500),
+]
+
+
+def _nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def explain(conn, statement):
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    return conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()[0]
+
+
+def run_check(conn, check: PlanCheck, table_rows: dict, index_tables: dict, min_rows: int, cost_scale: float):
+    plan = explain(conn, check.build(conn))
+    nodes = list(_nodes(plan["Plan"]))
+    used = sorted({node["Index Name"] for node in nodes if "Index Name" in node})
+    seq_scans = sorted({node["Relation Name"] for node in nodes if node["Node Type"] == "Seq Scan"})
+    result = PlanResult(check.name, plan["Plan"]["Total Cost"], used, seq_scans, note=check.note, plan=plan)
+
+    for table in seq_scans:
+        if table_rows.get(table, 0) >= min_rows and table not in check.allow_seq_scan:
+            result.problems.append(f"seq scan on {table} ({int(table_rows[table])} rows)")
+
+    for expected in check.indexes:
+        alternatives = expected if isinstance(expected, tuple) else (expected,)
+        if not any(table_rows.get(index_tables.get(name), 0) >= min_rows for name in alternatives):
+            continue  # too small for the planner to prefer an index
+        if not any(name in used for name in alternatives):
+            result.problems.append(f"expected index {' or '.join(alternatives)} not used")
+
+    if check.max_cost is not None and result.cost > check.max_cost * cost_scale:
+        result.problems.append(f"estimated cost {result.cost:.0f} over {check.max_cost * cost_scale:.0f}")
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-rows", type=int, default=10_000, help="tables at least this big must not be seq scanned")
+    parser.add_argument("--cost-scale", type=float, default=1.0, help="multiply every check's cost cap")
+    parser.add_argument("--only", action="append", help="run just the named check(s)")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    parser.add_argument("--json", action="store_true", help="machine-readable output")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("plan_check needs Postgres")
+
+    with engine.connect() as conn:
+        table_rows = dict(conn.execute(text(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' "
+            "AND relnamespace = 'public'::regnamespace"
+        )).all())
+        index_tables = dict(conn.execute(text(
+            "SELECT indexname, tablename FROM pg_indexes WHERE schemaname = 'public'"
+        )).all())
+
+        if table_rows.get("products", 0) < args.min_rows:
+            print(
+                f"products has ~{int(max(table_rows.get('products', 0), 0))} rows (fewer than --min-rows "
+                f"{args.min_rows}, or not analyzed); seed a bigger dataset with app.db.seed_data"
+            )
+            raise SystemExit(2)
+
+        checks = [c for c in CHECKS if not args.only or c.name in args.only]
+        results = [run_check(conn, c, table_rows, index_tables, args.min_rows, args.cost_scale) for c in checks]
+
+    failed = [r for r in results if r.problems]
+    if args.json:
+        print(json.dumps([
+            {k: v for k, v in vars(r).items() if k != "plan" or args.verbose}
+            for r in results
+        ], indent=2))
+    else:
+        for r in results:
+            status = "FAIL" if r.problems else "ok"
+            print(f"{status:4}  {r.name}: cost {r.cost:.0f}, indexes {', '.join(r.indexes) or '-'}")
+            for problem in r.problems:
+                print(f"      {problem}")
+            if r.note:
+                print(f"      note: {r.note}")
+            if args.verbose:
+                print(json.dumps(r.plan, indent=2))
+        print(f"{len(results) - len(failed)}/{len(results)} plans ok")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from sqlalchemy import event, exc
+
+from app.core.metrics import Histogram
+
+
+class PoolMetrics:
+    # The recent wait halves every this many seconds without checkouts.
+    # Shed requests never check out a connection, so without decay a
+    # spike would keep shedding on until the next successful checkout.
+    RECENT_WAIT_HALF_LIFE_SECONDS = 2.0
+
+    def __init__(self):
+        # Time spent in pool.connect(): queueing for a free connection,
+        # opening a new one and the pre-ping
+        self.wait = Histogram()
+        # Time a connection stays checked out by a request
+        self.held = Histogram()
+        self.timeouts = 0
+        self.connects = 0
+        # Exponentially weighted recent wait, used for load shedding
+        self._recent_wait = 0.0
+        self._recent_wait_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed_wait(self, now: float):
+        elapsed = max(now - self._recent_wait_at, 0.0)
+        return self._recent_wait * 0.5 ** (elapsed / self.RECENT_WAIT_HALF_LIFE_SECONDS)
+
+    def observe_wait(self, seconds: float):
+        self.wait.observe(seconds)
+        now = time.monotonic()
+        with self._lock:
+            self._recent_wait = 0.9 * self._decayed_wait(now) + 0.1 * seconds
+            self._recent_wait_at = now
+
+    @property
+    def recent_wait(self):
+        return self._decayed_wait(time.monotonic())
+
+
+# Instrumented pools by name, for pool_saturated() and the metrics endpoint
+pools = {}
+
+
+def timed_pool_class(base, metrics: PoolMetrics):
+    """
+    `base` with connect() timed into `metrics`. Pool recreation (dispose,
+    invalidation) builds the same class again, so the timing survives it.
+    """
+    class TimedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                metrics.timeouts += 1
+                raise
+            finally:
+                metrics.observe_wait(time.perf_counter() - start)
+
+    TimedPool.__name__ = TimedPool.__qualname__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def instrument_pool(engine, metrics: PoolMetrics, name: str):
+    """Count connects and checkout hold times; `engine` is a sync Engine (async_engine.sync_engine)."""
+    pools[name] = (engine, metrics)
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connects += 1
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            metrics.held.observe(time.perf_counter() - started)
+
+
+def pool_status(engine, metrics: PoolMetrics):
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "connects": metrics.connects,
+        "timeouts": metrics.timeouts,
+        "recent_wait_ms": round(metrics.recent_wait * 1000, 3),
+        "wait_seconds": metrics.wait.snapshot(),
+        "checkout_held_seconds": metrics.held.snapshot()
+    }
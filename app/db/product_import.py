@@ -0,0 +1,283 @@
+import argparse
+import csv
+import json
+import re
+
+import psycopg2
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import app.db.base  # registers every model so FKs resolve when run as a CLI
+from app.core.invalidation import notify_change
+from app.db.session import SessionLocal
+from app.models.admin_activity_logs import AdminActivityLog
+
+REQUIRED_COLUMNS = ["sku", "category_id", "brand_id", "name", "mrp", "price", "pack_size", "uom"]
+OPTIONAL_COLUMNS = ["description", "min_order_qty", "stock", "image", "hsn_code", "tax_percent"]
+
+# Defaults applied on insert when an optional column is missing or empty
+COLUMN_DEFAULTS = {
+    "min_order_qty": "1",
+    "stock": "0",
+    "tax_percent": "0",
+}
+
+# Casts from the all-text staging table into products column types
+COLUMN_CASTS = {
+    "mrp": "numeric",
+    "price": "numeric",
+    "tax_percent": "numeric",
+    "pack_size": "integer",
+    "min_order_qty": "integer",
+    "stock": "integer",
+}
+
+NUMERIC_RE = r"^[0-9]+(\.[0-9]+)?$"
+INTEGER_RE = r"^[0-9]+$"
+
+# Upper bounds of the products column types: Numeric(10,2), Numeric(5,2), int4
+COLUMN_MAX = {
+    "mrp": "99999999.99",
+    "price": "99999999.99",
+    "tax_percent": "999.99",
+    "pack_size": "2147483647",
+    "min_order_qty": "2147483647",
+    "stock": "2147483647",
+}
+
+# Must be > 0 (create_product rejects the same for min_order_qty)
+POSITIVE_COLUMNS = ["mrp", "price", "pack_size", "min_order_qty"]
+
+# varchar lengths of the products columns
+COLUMN_LENGTHS = {
+    "sku": 50,
+    "category_id": 20,
+    "brand_id": 20,
+    "name": 150,
+    "uom": 20,
+    "image": 255,
+    "hsn_code": 20,
+}
+
+MAX_REPORTED_ERRORS = 100
+
+
+class ProductImportError(ValueError):
+    def __init__(self, errors: list[dict]):
+        super().__init__(f"{len(errors)} invalid rows")
+        self.errors = errors
+
+
+def _read_header(stream) -> list[str]:
+    header = stream.readline().lstrip("\ufeff")
+    columns = [c.strip().lower() for c in next(csv.reader([header]), [])]
+
+    unknown = [c for c in columns if c not in REQUIRED_COLUMNS + OPTIONAL_COLUMNS]
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if unknown or missing or len(set(columns)) != len(columns):
+        raise ProductImportError([{
+            "line": 1,
+            "sku": None,
+            "error": f"Invalid header (unknown: {unknown}, missing: {missing})"
+        }])
+    return columns
+
+
+def _copy_into_stage(db: Session, stream, columns: list[str]):
+    db.execute(text(
+        "CREATE TEMP TABLE product_import_stage ("
+        "line bigserial, "
+        + ", ".join(f"{c} text" for c in REQUIRED_COLUMNS + OPTIONAL_COLUMNS)
+        + ") ON COMMIT DROP"
+    ))
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY product_import_stage ({', '.join(columns)}) "
+            "FROM STDIN WITH (FORMAT csv)",
+            stream
+        )
+    except (psycopg2.DataError, UnicodeDecodeError) as e:
+        # Unterminated quotes, extra fields, bad encoding. Only the line
+        # number is reported back, not the server's message.
+        context = getattr(getattr(e, "diag", None), "context", None) or ""
+        match = re.search(r"line (\d+)", context)
+        raise ProductImportError([{
+            "line": int(match.group(1)) + 1 if match else None,  # +1 for the header
+            "sku": None,
+            "error": "malformed CSV row"
+        }])
+    finally:
+        cursor.close()
+
+
+def _validate_stage(db: Session) -> list[dict]:
+    numeric_checks = " UNION ALL ".join(
+        f"SELECT line, sku, 'invalid {column}' FROM product_import_stage "
+        f"WHERE {column} IS NOT NULL AND {column} !~ '{INTEGER_RE if cast == 'integer' else NUMERIC_RE}'"
+        for column, cast in COLUMN_CASTS.items()
+    )
+    range_checks = " UNION ALL ".join(
+        f"SELECT line, sku, '{column} out of range' FROM product_import_stage "
+        f"WHERE CASE WHEN {column} ~ '{INTEGER_RE if cast == 'integer' else NUMERIC_RE}' "
+        f"THEN round({column}::numeric, 2) > {COLUMN_MAX[column]} ELSE false END"
+        for column, cast in COLUMN_CASTS.items()
+    )
+    positive_checks = " UNION ALL ".join(
+        f"SELECT line, sku, '{column} must be greater than 0' FROM product_import_stage "
+        f"WHERE CASE WHEN {column} ~ '{INTEGER_RE if COLUMN_CASTS[column] == 'integer' else NUMERIC_RE}' "
+        f"THEN round({column}::numeric, 2) <= 0 ELSE false END"
+        for column in POSITIVE_COLUMNS
+    )
+    length_checks = " UNION ALL ".join(
+        f"SELECT line, sku, '{column} longer than {length} characters' FROM product_import_stage "
+        f"WHERE length({column}) > {length}"
+        for column, length in COLUMN_LENGTHS.items()
+    )
+    required_check = " OR ".join(f"{c} IS NULL" for c in REQUIRED_COLUMNS)
+
+    rows = db.execute(text(f"""
+        SELECT line, sku, error FROM (
+            SELECT line, sku, 'missing required field' AS error
+            FROM product_import_stage WHERE {required_check}
+            UNION ALL
+            {numeric_checks}
+            UNION ALL
+            {range_checks}
+            UNION ALL
+            {positive_checks}
+            UNION ALL
+            {length_checks}
+            UNION ALL
+            SELECT line, sku, 'price cannot exceed MRP' FROM product_import_stage
+            WHERE CASE WHEN price ~ '{NUMERIC_RE}' AND mrp ~ '{NUMERIC_RE}'
+                  THEN price::numeric > mrp::numeric ELSE false END
+            UNION ALL
+            SELECT line, sku, 'duplicate sku in file' FROM (
+                SELECT line, sku, count(*) OVER (PARTITION BY sku) AS n
+                FROM product_import_stage WHERE sku IS NOT NULL
+            ) d WHERE n > 1
+            UNION ALL
+            SELECT line, sku, 'duplicate name in file' FROM (
+                SELECT line, sku, count(*) OVER (PARTITION BY name) AS n
+                FROM product_import_stage WHERE name IS NOT NULL
+            ) d WHERE n > 1
+            UNION ALL
+            SELECT s.line, s.sku, 'invalid category' FROM product_import_stage s
+            LEFT JOIN categories c ON c.category_id = s.category_id AND c.is_active
+            WHERE s.category_id IS NOT NULL AND c.id IS NULL
+            UNION ALL
+            SELECT s.line, s.sku, 'invalid brand' FROM product_import_stage s
+            LEFT JOIN brands b ON b.brand_id = s.brand_id AND b.is_active
+            WHERE s.brand_id IS NOT NULL AND b.id IS NULL
+            UNION ALL
+            SELECT s.line, s.sku, 'name used by another product' FROM product_import_stage s
+            JOIN products p ON p.name = s.name AND p.sku IS DISTINCT FROM s.sku
+        ) errors
+        ORDER BY line
+        LIMIT {MAX_REPORTED_ERRORS}
+    """)).all()
+
+    # +1 for the header line
+    return [{"line": line + 1, "sku": sku, "error": error} for line, sku, error in rows]
+
+
+def _upsert_products(db: Session, columns: list[str]) -> tuple[int, int]:
+    def staged(column):
+        value = column if column in columns else "NULL"
+        if column in COLUMN_DEFAULTS:
+            value = f"COALESCE({value}, '{COLUMN_DEFAULTS[column]}')"
+        if column in COLUMN_CASTS:
+            value = f"({value})::{COLUMN_CASTS[column]}"
+        return value
+
+    # Existing SKUs only take the columns present in the file
+    insert_columns = REQUIRED_COLUMNS + OPTIONAL_COLUMNS
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns if c != "sku")
+
+    # ids come from the serial sequence up front so the PRD business id
+    # is written in the same statement instead of a flush per product
+    rows = db.execute(text(f"""
+        INSERT INTO products (id, product_id, {", ".join(insert_columns)}, is_featured, is_active)
+        SELECT
+            n.id,
+            'PRD' || lpad(n.id::text, greatest(6, length(n.id::text)), '0'),
+            {", ".join(staged(c) for c in insert_columns)},
+            false,
+            true
+        FROM (
+            SELECT nextval(pg_get_serial_sequence('products', 'id')) AS id, s.*
+            FROM product_import_stage s
+        ) n
+        ON CONFLICT (sku) DO UPDATE SET {updates}, modified_at = now()
+        RETURNING (xmax = 0) AS inserted
+    """)).all()
+
+    created = sum(1 for (inserted,) in rows if inserted)
+    return created, len(rows) - created
+
+
+def import_products_csv(db: Session, stream, admin_id: str, ip_address: str | None = None, filename: str | None = None):
+    """
+    Load a product CSV (text stream) in one transaction.
+
+    The file is COPY'd into a temp staging table, validated with a
+    handful of set-based queries and upserted into products by SKU in a
+    single INSERT ... ON CONFLICT. Any invalid row rejects the whole
+    file with a ProductImportError listing the offending lines.
+    """
+    try:
+        columns = _read_header(stream)
+        _copy_into_stage(db, stream, columns)
+
+        errors = _validate_stage(db)
+        if errors:
+            raise ProductImportError(errors)
+
+        created, updated = _upsert_products(db, columns)
+
+        db.add(AdminActivityLog(
+            admin_id=admin_id,
+            action="IMPORT",
+            module="Product",
+            endpoint="/admin/products/import",
+            method="POST",
+            description=f"Imported {created + updated} products ({created} created, {updated} updated)",
+            ip_address=ip_address,
+            payload=json.dumps({
+                "file": filename,
+                "created": created,
+                "updated": updated
+            })
+        ))
+        notify_change(db, "product")
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return {"created": created, "updated": updated}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import products from a CSV file")
+    parser.add_argument("file")
+    parser.add_argument("--admin", required=True, help="admin_id recorded in the activity log")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        with open(args.file, encoding="utf-8", newline="") as f:
+            result = import_products_csv(db, f, args.admin, filename=args.file)
+        print(f"Imported products: {result['created']} created, {result['updated']} updated")
+    except ProductImportError as e:
+        for error in e.errors:
+            print(f"line {error['line']} ({error['sku']}): {error['error']}")
+        raise SystemExit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
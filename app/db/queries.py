@@ -0,0 +1,150 @@
+"""
+Statements behind the hot endpoints. The routes execute them and
+app.db.plan_check explains the very same builders, so a query change
+in a route is a change to what the plan check covers.
+"""
+from datetime import datetime
+
+from sqlalchemy import func, or_, select, tuple_
+
+from app.models.admin_activity_logs import AdminActivityLog
+from app.models.brand import Brand
+from app.models.cart import Cart
+from app.models.categories import Category
+from app.models.enquiries import Enquiry
+from app.models.products import Product
+
+
+# ==========================================================
+# STOREFRONT (DB fallbacks when there is no catalog snapshot)
+# ==========================================================
+
+def category_products(category_id: str):
+    return select(Product).where(Product.category_id == category_id, Product.is_active == True)
+
+
+def brand_products(brand_id: str):
+    return select(Product).where(Product.brand_id == brand_id, Product.is_active == True)
+
+
+def search_products(q: str):
+    return (
+        select(Product)
+        .join(Category)
+        .join(Brand)
+        .where(
+            Product.is_active == True,
+            or_(
+                Product.name.ilike(f"%{q}%"),
+                Product.description.ilike(f"%{q}%"),
+                Category.name.ilike(f"%{q}%"),
+                Brand.name.ilike(f"%{q}%")
+            )
+        )
+    )
+
+
+def filter_products(
+    category_ids: list[str] | None = None,
+    brand_ids: list[str] | None = None,
+    min_price: float | None = None,
+    max_price: float | None = None,
+    min_order_qty: int | None = None
+):
+    query = select(Product).where(Product.is_active == True)
+
+    if category_ids:
+        query = query.where(Product.category_id.in_(category_ids))
+
+    if brand_ids:
+        query = query.where(Product.brand_id.in_(brand_ids))
+
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+
+    if min_order_qty is not None:
+        query = query.where(Product.min_order_qty >= min_order_qty)
+
+    return query
+
+
+def cart_items(session_id: str):
+    return (
+        select(Cart, Product)
+        .join(Product, Cart.product_id == Product.product_id)
+        .where(Cart.session_id == session_id)
+    )
+
+
+# ==========================================================
+# ADMIN
+# ==========================================================
+
+def _activity_log_filters(query, admin_id: str | None, module: str | None, action: str | None):
+    if admin_id:
+        query = query.where(AdminActivityLog.admin_id == admin_id)
+
+    if module:
+        query = query.where(AdminActivityLog.module == module)
+
+    if action:
+        query = query.where(AdminActivityLog.action == action)
+
+    return query
+
+
+def activity_logs_page(
+    admin_id: str | None = None,
+    module: str | None = None,
+    action: str | None = None,
+    limit: int = 20,
+    offset: int = 0
+):
+    # limit + 1 rows: the extra one tells the caller there is a next page
+    query = _activity_log_filters(select(AdminActivityLog), admin_id, module, action)
+    return query.order_by(AdminActivityLog.created_at.desc()).offset(offset).limit(limit + 1)
+
+
+def activity_logs_count(
+    admin_id: str | None = None,
+    module: str | None = None,
+    action: str | None = None
+):
+    return _activity_log_filters(select(func.count(AdminActivityLog.id)), admin_id, module, action)
+
+
+def enquiries_page(
+    status: str | None = None,
+    email: str | None = None,
+    assigned_admin_id: int | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    cursor: tuple[datetime, int] | None = None,
+    limit: int = 20
+):
+    query = select(Enquiry).where(Enquiry.is_active == True)
+
+    if status:
+        query = query.where(Enquiry.status == status.upper())
+
+    if email:
+        query = query.where(Enquiry.email == email)
+
+    if assigned_admin_id is not None:
+        query = query.where(Enquiry.assigned_admin_id == assigned_admin_id)
+
+    if date_from:
+        query = query.where(Enquiry.created_at >= date_from)
+
+    if date_to:
+        query = query.where(Enquiry.created_at < date_to)
+
+    # Keyset pagination on (created_at, id): each page is an index
+    # range scan instead of an OFFSET that reads every skipped row.
+    if cursor is not None:
+        query = query.where(tuple_(Enquiry.created_at, Enquiry.id) < cursor)
+
+    return query.order_by(Enquiry.created_at.desc(), Enquiry.id.desc()).limit(limit)
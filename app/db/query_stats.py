@@ -0,0 +1,169 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.db.slow_queries import slow_query_log
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Statements run (and time spent in the driver) within one request or capture."""
+
+    def __init__(self, track_shapes: bool = False, route: str | None = None):
+        self.route = route
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter() if track_shapes else None
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.duration += seconds
+        if self.shapes is not None:
+            self.shapes[statement] += 1
+
+    def repeated(self, threshold: int):
+        """Statement shapes run at least `threshold` times: suspected N+1."""
+        if not self.shapes:
+            return []
+        return [(statement, n) for statement, n in self.shapes.most_common() if n >= threshold]
+
+
+# Stats of the request being served; anyio copies the context into
+# threadpool workers and the async driver's greenlets, so sync and async
+# routes both see it
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+# Open assert_max_queries() blocks; they see every statement, whichever
+# request or thread runs it
+_captures: list[QueryStats] = []
+
+
+def instrument_queries(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_started_at"].pop()
+
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.record(statement, seconds)
+        for capture in _captures:
+            capture.record(statement, seconds)
+
+        slow_query_log.record(
+            conn.dialect.name, statement, parameters, executemany, seconds,
+            stats.route if stats is not None else None
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        started = context.connection.info.get("query_started_at") if context.connection else None
+        if started:
+            started.pop()
+
+
+class QueryStatsMiddleware:
+    """
+    Count statements and DB time per request. Totals go out as
+    Server-Timing / X-DB-Queries headers (as of when the response starts)
+    and into the log once the request finishes. With detect_n_plus_one,
+    statement shapes repeated `threshold` times are logged as warnings.
+    """
+
+    def __init__(self, app, detect_n_plus_one: bool = False, threshold: int = 5):
+        self.app = app
+        self.detect_n_plus_one = detect_n_plus_one
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(
+            track_shapes=self.detect_n_plus_one,
+            route=f"{scope['method']} {scope['path']}"
+        )
+        token = current_query_stats.set(stats)
+        status = None
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries"'.encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_query_stats.reset(token)
+            self._log(scope, status, stats)
+
+    def _log(self, scope, status, stats: QueryStats):
+        fields = {
+            "method": scope["method"],
+            "path": scope["path"],
+            "status": status,
+            "db_queries": stats.count,
+            "db_ms": round(stats.duration * 1000, 1),
+        }
+        logger.debug(
+            "%s %s: %d queries in %.1f ms",
+            scope["method"], scope["path"], stats.count, stats.duration * 1000,
+            extra=fields
+        )
+
+        if self.detect_n_plus_one:
+            for statement, n in stats.repeated(self.threshold):
+                logger.warning(
+                    "Suspected N+1 in %s %s: statement ran %d times: %s",
+                    scope["method"], scope["path"], n, " ".join(statement.split())[:500],
+                    extra={**fields, "repeats": n}
+                )
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """
+    Fail if the block runs more than `limit` statements, e.g.
+
+        with assert_max_queries(3):
+            client.get("/user/products")
+
+    Counts every statement issued while the block is open (TestClient
+    requests included), and lists them in the AssertionError.
+    """
+    capture = QueryStats(track_shapes=True)
+    _captures.append(capture)
+    try:
+        yield capture
+    finally:
+        _captures.remove(capture)
+
+    if capture.count > limit:
+        statements = "\n".join(
+            f"  {n}x {' '.join(statement.split())[:200]}"
+            for statement, n in capture.shapes.most_common()
+        )
+        raise AssertionError(f"{capture.count} queries run, at most {limit} expected:\n{statements}")
+
+
+def n_plus_one_detection_enabled():
+    if settings.QUERY_N_PLUS_ONE_DETECTION is not None:
+        return settings.QUERY_N_PLUS_ONE_DETECTION
+    return settings.ENV != "production"
@@ -0,0 +1,88 @@
+import random
+from contextvars import ContextVar
+
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+from starlette.requests import Request
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Who the current request belongs to (admin token, storefront session or
+# IP); set per request by ClientContextMiddleware
+current_client: ContextVar[str | None] = ContextVar("current_client", default=None)
+
+# Clients that committed a write recently; their reads stay on the
+# primary until the entry expires so they see their own changes
+recent_writers = TTLCache(maxsize=10000, ttl=settings.READ_YOUR_WRITES_SECONDS)
+
+
+def routing_session_class(primary, replicas: list):
+    """
+    Build a Session class that sends reads to a random replica and
+    everything else to the primary.
+
+    A session moves to the primary for good once it flushes or runs a
+    write. Raw text() statements, SELECT ... FOR UPDATE and bare
+    connection() calls count as writes since they can't be classified.
+    Commits of such sessions make the
+    client sticky to the primary for READ_YOUR_WRITES_SECONDS.
+
+    Flushes into READ_YOUR_WRITES_IGNORED_TABLES (visit logs written on
+    every storefront request) go to the primary without making anyone
+    sticky.
+    """
+    untracked = set(settings.READ_YOUR_WRITES_IGNORED_TABLES)
+
+    class RoutingSession(Session):
+        def get_bind(self, mapper=None, clause=None, **kw):
+            if self.info.get("wrote"):
+                return primary
+
+            if self._flushing and mapper is not None and mapper.local_table.name in untracked:
+                return primary
+
+            is_read = isinstance(clause, Select) and clause._for_update_arg is None
+            if self._flushing or not is_read:
+                self.info["wrote"] = True
+                return primary
+
+            client = current_client.get()
+            if client and recent_writers.get(client):
+                return primary
+
+            return random.choice(replicas)
+
+        def commit(self):
+            wrote = self.info.pop("wrote", False)
+            super().commit()
+            client = current_client.get()
+            if wrote and client:
+                recent_writers.set(client, True)
+
+        def rollback(self):
+            self.info.pop("wrote", None)
+            super().rollback()
+
+    return RoutingSession
+
+
+class ClientContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request = Request(scope)
+        client = (
+            request.cookies.get("admin_token")
+            or request.cookies.get("session_id")
+            or (request.client.host if request.client else None)
+        )
+        token = current_client.set(client)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_client.reset(token)
@@ -1,164 +1,454 @@
-from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
-from app.models.categories import Category
-from app.models.products import Product
-from app.models.cart import Cart
-from app.models.enquiries import Enquiry
-from app.models.enquiry_items import EnquiryItem
-from app.models.admin_users import AdminUser
-from app.models.admin_details import AdminDetail
-from app.models.email_logs import EmailLog
-from app.models.user_visits import UserVisit
-from app.models.admin_activity_logs import AdminActivityLog
-
-def seed():
-    db: Session = SessionLocal()
+"""
+Generate a synthetic catalog and traffic history of any size.
 
+Categories (a tree), brands, admins, products, carts, enquiries with
+their items and email logs, user visits and admin activity logs are
+generated deterministically from --seed. On Postgres the large tables
+are split into chunks that worker processes generate and COPY in
+parallel; secondary indexes are dropped for the load and rebuilt once
+at the end. Other databases get plain batched inserts in one process.
+
+    python -m app.db.seed_data --reset --products 1000000 --enquiries 200000 --visits 5000000 --workers 8
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from multiprocessing import get_context
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.pool import NullPool
+
+import app.db.base  # noqa: F401  registers every model
+from app.core.config import settings
+from app.db.migrate import create_missing_indexes
+from app.db.session import Base, engine
+
+NOUNS = [
+    "notebook", "pen", "pencil", "marker", "stapler", "folder", "envelope", "eraser",
+    "ruler", "highlighter", "binder", "sharpener", "register", "tape", "calculator"
+]
+ADJECTIVES = ["classic", "premium", "eco", "smooth", "bold", "slim", "jumbo", "pocket", "office", "student"]
+UOMS = ["PCS", "BOX", "PACK", "REAM"]
+PACK_SIZES = [1, 5, 10, 20, 50, 100, 500]
+TAX_PERCENTS = [0, 5, 12, 18]
+ENQUIRY_STATUSES = ["NEW"] * 4 + ["CONTACTED"] * 3 + ["QUOTED"] * 2 + ["CLOSED"] * 2 + ["CANCELLED"]
+ACTIVITY = [
+    ("CREATE", "Product", "POST", "/admin/products"),
+    ("UPDATE", "Product", "PUT", "/admin/products/{id}"),
+    ("UPDATE", "Category", "PUT", "/admin/categories/{id}"),
+    ("UPDATE", "Enquiry", "PUT", "/admin/enquiries/{id}"),
+    ("DELETE", "Product", "DELETE", "/admin/products/{id}"),
+    ("LOGIN", "Auth", "POST", "/admin/login"),
+]
+USER_AGENTS = [
+    ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/126.0", "desktop", "Chrome", "Windows"),
+    ("Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) Safari/605.1.15", "desktop", "Safari", "macOS"),
+    ("Mozilla/5.0 (Linux; Android 14; Pixel 8) Chrome/126.0 Mobile", "mobile", "Chrome", "Android"),
+    ("Mozilla/5.0 (iPhone; CPU iPhone OS 17_5) Safari/604.1 Mobile", "mobile", "Safari", "iOS"),
+    ("Mozilla/5.0 (X11; Linux x86_64; rv:127.0) Firefox/127.0", "desktop", "Firefox", "Linux"),
+]
+REFERERS = [None, None, "https://www.google.com/", "https://www.bing.com/", "https://www.instagram.com/"]
+
+# Rows per COPY; each worker holds one chunk's CSV in memory
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+@dataclass
+class Scale:
+    categories: int = 50
+    brands: int = 200
+    admins: int = 5
+    products: int = 10_000
+    carts: int = 1_000
+    enquiries: int = 5_000
+    visits: int = 50_000
+    activity_logs: int = 10_000
+    days: int = 365
+
+
+def category_id(i: int):
+    return f"CAT{str(i).zfill(4)}"
+
+
+def brand_id(i: int):
+    return f"BRD{str(i).zfill(4)}"
+
+
+def admin_id(i: int):
+    return f"ADM{str(i).zfill(4)}"
+
+
+def product_id(i: int):
+    return f"PRD{str(i).zfill(6)}"
+
+
+def product(seed: int, i: int, scale: Scale):
+    """
+    Product i's attributes. A function of (seed, i) alone, so any worker
+    can rebuild the price and name that carts and enquiry items refer to.
+    """
+    rng = random.Random(seed * 1_000_003 + i)
+    noun = NOUNS[i % len(NOUNS)]
+    adjective = rng.choice(ADJECTIVES)
+    mrp = round(rng.uniform(10, 2000), 2)
+    return {
+        "id": i,
+        "product_id": product_id(i),
+        "category_id": category_id(rng.randint(1, scale.categories)),
+        "brand_id": brand_id(rng.randint(1, scale.brands)),
+        "name": f"{adjective.title()} {noun} {i}",
+        "description": f"{adjective} {noun} for school and office use",
+        "sku": f"SKU{str(i).zfill(8)}",
+        "mrp": mrp,
+        "price": round(mrp * rng.uniform(0.6, 1.0), 2),
+        "pack_size": rng.choice(PACK_SIZES),
+        "uom": rng.choice(UOMS),
+        "min_order_qty": rng.choice([1, 1, 1, 5, 10, 25]),
+        "stock": rng.randint(100, 10_000),
+        "image": f"{noun}.jpg",
+        "hsn_code": str(4800 + i % 100),
+        "tax_percent": rng.choice(TAX_PERCENTS),
+        "is_featured": rng.random() < 0.02,
+        "is_active": rng.random() < 0.97
+    }
+
+
+def _timestamp(rng: random.Random, now: datetime, days: int):
+    return now - timedelta(seconds=rng.randrange(days * 86400))
+
+
+def _chunk_rng(seed: int, table: str, start: int):
+    return random.Random(f"{seed}:{table}:{start}")
+
+
+def products_chunk(seed, scale, start, end, now):
+    rng = _chunk_rng(seed, "products", start)
+    for i in range(start, end):
+        row = product(seed, i, scale)
+        row["created_at"] = row["modified_at"] = _timestamp(rng, now, scale.days)
+        yield "products", row
+
+
+def carts_chunk(seed, scale, start, end, now):
+    rng = _chunk_rng(seed, "cart", start)
+    for _ in range(start, end):
+        session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        created_at = _timestamp(rng, now, min(scale.days, 7))
+        user_agent = rng.choice(USER_AGENTS)[0]
+        ip_address = f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}"
+        for i in rng.sample(range(1, scale.products + 1), min(rng.randint(1, 4), scale.products)):
+            yield "cart", {
+                "session_id": session_id,
+                "product_id": product_id(i),
+                "quantity": product(seed, i, scale)["min_order_qty"] * rng.randint(1, 5),
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "created_at": created_at,
+                "modified_at": created_at
+            }
+
+
+def enquiries_chunk(seed, scale, start, end, now):
+    rng = _chunk_rng(seed, "enquiries", start)
+    # Returning customers: emails repeat across enquiries
+    customers = max(scale.enquiries // 3, 1)
+    for enquiry_id in range(start, end):
+        customer = rng.randrange(customers)
+        created_at = _timestamp(rng, now, scale.days)
+        user_agent = rng.choice(USER_AGENTS)[0]
+        status = rng.choice(ENQUIRY_STATUSES)
+        yield "enquiries", {
+            "id": enquiry_id,
+            "customer_name": f"Customer {customer}",
+            "email": f"customer{customer}@example.com",
+            "phone": f"9{customer:09d}"[:10],
+            "address": f"{rng.randint(1, 999)} Market Road, Pune",
+            "session_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "status": status,
+            "assigned_admin_id": rng.randint(1, scale.admins) if status != "NEW" else None,
+            "admin_notes": None,
+            "ip_address": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+            "user_agent": user_agent,
+            "is_active": rng.random() < 0.98,
+            "created_at": created_at,
+            "modified_at": created_at
+        }
+        for i in rng.sample(range(1, scale.products + 1), min(rng.randint(1, 5), scale.products)):
+            p = product(seed, i, scale)
+            quantity = p["min_order_qty"] * rng.randint(1, 10)
+            yield "enquiry_items", {
+                "enquiry_id": enquiry_id,
+                "product_id": p["product_id"],
+                "product_name": p["name"],
+                "uom": p["uom"],
+                "pack_size": str(p["pack_size"]),
+                "quantity": quantity,
+                "price": p["price"],
+                "total_price": round(p["price"] * quantity, 2),
+                "is_active": True,
+                "created_at": created_at,
+                "modified_at": created_at
+            }
+        for email_to in (settings.ADMIN_EMAIL, f"customer{customer}@example.com"):
+            yield "email_logs", {
+                "enquiry_id": enquiry_id,
+                "email_to": email_to,
+                "sent_status": rng.random() < 0.99,
+                "created_at": created_at,
+                "modified_at": created_at
+            }
+
+
+def visits_chunk(seed, scale, start, end, now):
+    rng = _chunk_rng(seed, "user_visits", start)
+    for _ in range(start, end):
+        user_agent, device_type, browser, os_name = rng.choice(USER_AGENTS)
+        page = rng.random()
+        if page < 0.3:
+            visited_page = "/user/products"
+        elif page < 0.6:
+            visited_page = f"/user/categories/{category_id(rng.randint(1, scale.categories))}/products"
+        elif page < 0.75:
+            visited_page = f"/user/brands/{brand_id(rng.randint(1, scale.brands))}/products"
+        elif page < 0.9:
+            visited_page = "/user/products/search"
+        else:
+            visited_page = "/user/categories"
+        yield "user_visits", {
+            "session_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "ip_address": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}",
+            "user_agent": user_agent,
+            "visited_page": visited_page,
+            "referer": rng.choice(REFERERS),
+            "device_type": device_type,
+            "browser": browser,
+            "os": os_name,
+            "visited_at": _timestamp(rng, now, scale.days)
+        }
+
+
+def activity_logs_chunk(seed, scale, start, end, now):
+    rng = _chunk_rng(seed, "admin_activity_logs", start)
+    for _ in range(start, end):
+        action, module, method, endpoint = rng.choice(ACTIVITY)
+        target = product_id(rng.randint(1, scale.products))
+        yield "admin_activity_logs", {
+            "admin_id": admin_id(rng.randint(1, scale.admins)),
+            "action": action,
+            "module": module,
+            "endpoint": endpoint.format(id=target),
+            "method": method,
+            "description": f"{action.title()} {module.lower()} {target}",
+            "ip_address": f"192.168.{rng.randrange(256)}.{rng.randrange(256)}",
+            "payload": json.dumps({"stock": rng.randint(0, 5000)}) if action == "UPDATE" else None,
+            "created_at": _timestamp(rng, now, scale.days)
+        }
+
+
+# Parallel tables: (count on Scale, generator). Products go first since
+# the rest reference them.
+PRODUCT_TABLES = [("products", products_chunk)]
+HISTORY_TABLES = [
+    ("carts", carts_chunk),
+    ("enquiries", enquiries_chunk),
+    ("visits", visits_chunk),
+    ("activity_logs", activity_logs_chunk),
+]
+CHUNK_GENERATORS = dict(PRODUCT_TABLES + HISTORY_TABLES)
+
+
+def _write_copy(connection, rows):
+    # One CSV buffer per table (a chunk can feed several, e.g. enquiries
+    # and their items), COPY'd in FK order
+    buffers = {}
+    for table, row in rows:
+        if table not in buffers:
+            buffer = io.StringIO()
+            buffers[table] = (list(row), buffer, csv.writer(buffer))
+        columns, _, writer = buffers[table]
+        writer.writerow([_csv_value(row[c]) for c in columns])
+
+    cursor = connection.cursor()
     try:
-        # ----------------------------
-        # ADMIN USERS
-        # ----------------------------
-        admin1 = AdminUser(
-            username="admin",
-            password="admin123",
-            email="admin@test.com",
-            is_super_admin=True
-        )
-        admin2 = AdminUser(
-            username="",
-            password="vendor123",
-            email="vendor@test.com",
-            is_super_admin=False
-        )
-        db.add_all([admin1, admin2])
-        db.commit()
-
-        # ----------------------------
-        # ADMIN DETAILS
-        # ----------------------------
-        db.add_all([
-            AdminDetail(admin_id=admin1.id, detail_type="address", detail_value="Pune, India"),
-            AdminDetail(admin_id=admin1.id, detail_type="phone", detail_value="+919999999999")
-        ])
-        db.commit()
-
-        # ----------------------------
-        # CATEGORIES
-        # ----------------------------
-        cat1 = Category(
-            category_id="CAT001",
-            name="Notebooks",
-            description="School & office notebooks",
-            image="notebooks.jpg"
-        )
-        cat2 = Category(
-            category_id="CAT002",
-            name="Pens",
-            description="Ball pens & gel pens",
-            image="pens.jpg"
-        )
-        db.add_all([cat1, cat2])
-        db.commit()
-
-        # ----------------------------
-        # PRODUCTS
-        # ----------------------------
-        prod1 = Product(
-            product_id="PRD001",
-            category_id="CAT001",
-            name="Classmate Notebook",
-            description="200 pages notebook",
-            price=120,
-            min_order_qty=10,
-            stock=500,
-            image="classmate.jpg"
-        )
-        prod2 = Product(
-            product_id="PRD002",
-            category_id="CAT002",
-            name="Reynolds Pen",
-            description="Blue ball pen",
-            price=10,
-            min_order_qty=50,
-            stock=2000,
-            image="reynolds.jpg"
-        )
-        db.add_all([prod1, prod2])
-        db.commit()
-
-        # ----------------------------
-        # CART
-        # ----------------------------
-        cart1 = Cart(session_id="sess123", product_id="PRD001", quantity=20)
-        cart2 = Cart(session_id="sess123", product_id="PRD002", quantity=100)
-        db.add_all([cart1, cart2])
-        db.commit()
-
-        # ----------------------------
-        # ENQUIRIES
-        # ----------------------------
-        enquiry = Enquiry(customer_name="ABC Stationery", phone="9876543210")
-        db.add(enquiry)
-        db.commit()
-        db.refresh(enquiry)
-
-        # ----------------------------
-        # ENQUIRY ITEMS
-        # ----------------------------
-        db.add_all([
-            EnquiryItem(enquiry_id=enquiry.id, product_id="PRD001", quantity=20),
-            EnquiryItem(enquiry_id=enquiry.id, product_id="PRD002", quantity=100)
-        ])
-        db.commit()
-
-        # ----------------------------
-        # EMAIL LOGS
-        # ----------------------------
-        db.add_all([
-            EmailLog(enquiry_id=enquiry.id, email_to="admin@test.com", sent_status=True),
-            EmailLog(enquiry_id=enquiry.id, email_to="vendor@test.com", sent_status=True)
-        ])
-        db.commit()
-
-        # ----------------------------
-        # USER VISITS
-        # ----------------------------
-        db.add_all([
-            UserVisit(session_id="sess123", ip_address="127.0.0.1", visited_page="/"),
-            UserVisit(session_id="sess123", ip_address="127.0.0.1", visited_page="/categories")
-        ])
-        db.commit()
-
-        # ----------------------------
-        # ADMIN ACTIVITY LOGS
-        # ----------------------------
-        db.add_all([
-            AdminActivityLog(
-                admin_id=admin1.id,
-                action="CREATE",
-                module="CATEGORY",
-                description="Added Notebooks category",
-                ip_address="127.0.0.1"
-            ),
-            AdminActivityLog(
-                admin_id=admin1.id,
-                action="CREATE",
-                module="PRODUCT",
-                description="Added Classmate Notebook",
-                ip_address="127.0.0.1"
-            )
-        ])
-        db.commit()
-
-        print("✅ Dummy data inserted successfully")
-
-    except Exception as e:
-        db.rollback()
-        print("❌ Error inserting dummy data:", e)
+        for table, (columns, buffer, _) in buffers.items():
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _csv_value(value):
+    # Unquoted empty is NULL in COPY's csv format
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _write_insert(connection, rows):
+    tables = {}
+    for table, row in rows:
+        tables.setdefault(table, []).append(row)
+    for table, batch in tables.items():
+        connection.execute(insert(Base.metadata.tables[table]), batch)
 
+
+def load_chunk(kind: str, seed: int, scale: Scale, start: int, end: int, now: datetime):
+    """Generate rows [start, end) of `kind` and load them; runs in a worker process."""
+    rows = CHUNK_GENERATORS[kind](seed, scale, start, end, now)
+    chunk_engine = create_engine(settings.DATABASE_URL, poolclass=NullPool)
+    try:
+        if chunk_engine.dialect.name == "postgresql":
+            connection = chunk_engine.raw_connection()
+            try:
+                _write_copy(connection, rows)
+                connection.commit()
+            finally:
+                connection.close()
+        else:
+            with chunk_engine.begin() as connection:
+                _write_insert(connection, rows)
     finally:
-        db.close()
+        chunk_engine.dispose()
+    return kind, end - start
+
+
+def _chunks(kind, count, chunk_size):
+    return [(kind, start, min(start + chunk_size, count + 1)) for start in range(1, count + 1, chunk_size)]
+
+
+def _seed_small_tables(connection, seed: int, scale: Scale, admin_password: str, now: datetime):
+    from app.core.security import hash_password
+
+    rng = random.Random(f"{seed}:small")
+
+    # A tree: the first tenth are roots, the rest hang off an earlier category
+    roots = max(scale.categories // 10, 1)
+    categories = []
+    for i in range(1, scale.categories + 1):
+        noun = NOUNS[i % len(NOUNS)]
+        categories.append({
+            "id": i,
+            "category_id": category_id(i),
+            "parent_id": category_id(rng.randint(1, i - 1)) if i > roots else None,
+            "name": f"{noun.title()}s {i}",
+            "description": f"All kinds of {noun}s",
+            "image": f"{noun}.jpg",
+            "is_active": rng.random() < 0.95
+        })
+    connection.execute(insert(Base.metadata.tables["categories"]), categories)
+
+    connection.execute(insert(Base.metadata.tables["brands"]), [
+        {"id": i, "brand_id": brand_id(i), "name": f"Brand {i}", "image": f"brand{i}.jpg", "is_active": rng.random() < 0.95}
+        for i in range(1, scale.brands + 1)
+    ])
+
+    password_hash = hash_password(admin_password)
+    connection.execute(insert(Base.metadata.tables["admin_users"]), [
+        {
+            "id": i,
+            "admin_id": admin_id(i),
+            "username": "admin" if i == 1 else f"admin{i}",
+            "email": f"admin{i}@example.com",
+            "password_hash": password_hash,
+            "role": "super_admin" if i == 1 else "admin",
+            "is_super_admin": i == 1,
+            "is_active": True
+        }
+        for i in range(1, scale.admins + 1)
+    ])
+    connection.execute(insert(Base.metadata.tables["admin_details"]), [
+        {"admin_id": admin_id(i), "detail_type": detail_type, "detail_value": value}
+        for i in range(1, scale.admins + 1)
+        for detail_type, value in (("phone", f"+9199{i:08d}"), ("address", "Pune, India"))
+    ])
+
+
+def _drop_secondary_indexes():
+    # Unique indexes stay: foreign keys depend on them
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            if not index.unique:
+                index.drop(bind=engine, checkfirst=True)
+
+
+def _reset_sequences(connection):
+    for table in ("categories", "brands", "admin_users", "products", "enquiries"):
+        connection.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT COALESCE(MAX(id), 0) + 1 FROM {table}), false)"
+        ))
+
+
+def seed(scale: Scale, seed: int = 1, workers: int = 4, chunk_size: int = DEFAULT_CHUNK_SIZE,
+         admin_password: str = "admin123", progress=print):
+    """Wipe the database and load a generated dataset of the given scale."""
+    postgres = engine.dialect.name == "postgresql"
+    now = datetime.now(timezone.utc)
+    started = time.perf_counter()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    if postgres:
+        _drop_secondary_indexes()
+
+    with engine.begin() as connection:
+        _seed_small_tables(connection, seed, scale, admin_password, now)
+    progress(f"categories, brands, admins: {time.perf_counter() - started:.1f}s")
+    engine.dispose()  # nothing shared with the worker processes
+
+    for phase in (PRODUCT_TABLES, HISTORY_TABLES):
+        chunks = [
+            chunk
+            for kind, _ in phase
+            for chunk in _chunks(kind, getattr(scale, kind), chunk_size)
+        ]
+        if postgres and workers > 1:
+            with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as pool:
+                futures = [pool.submit(load_chunk, kind, seed, scale, start, end, now) for kind, start, end in chunks]
+                results = [future.result() for future in futures]
+        else:
+            # SQLite and friends take one writer at a time anyway
+            results = [load_chunk(kind, seed, scale, start, end, now) for kind, start, end in chunks]
+
+        loaded = {}
+        for kind, n in results:
+            loaded[kind] = loaded.get(kind, 0) + n
+        for kind, n in loaded.items():
+            progress(f"{kind}: {n} rows, {time.perf_counter() - started:.1f}s")
+
+    if postgres:
+        create_missing_indexes()
+        with engine.begin() as connection:
+            _reset_sequences(connection)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text("ANALYZE"))
+        progress(f"indexes and statistics: {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    defaults = Scale()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reset", action="store_true", required=True, help="confirm that DATABASE_URL is wiped")
+    for field, value in asdict(defaults).items():
+        parser.add_argument(f"--{field.replace('_', '-')}", type=int, default=value)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--admin-password", default="admin123")
+    args = parser.parse_args()
+
+    scale = Scale(**{field: getattr(args, field) for field in asdict(defaults)})
+    seed(scale, args.seed, args.workers, args.chunk_size, args.admin_password)
+    print(f"Seeded {asdict(scale)}; log in as admin / {args.admin_password}")
 
 
 if __name__ == "__main__":
-    seed()
+    main()
@@ -1,16 +1,46 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics, instrument_pool, pools, timed_pool_class
+from app.db.query_stats import instrument_queries
+from app.db.routing import routing_session_class
+
+connect_args = {}
+if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+    connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+pool_options = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+pool_metrics = PoolMetrics()
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True
+    poolclass=timed_pool_class(QueuePool, pool_metrics),
+    connect_args=connect_args,
+    **pool_options
 )
+instrument_pool(engine, pool_metrics, "sync")
+instrument_queries(engine)
+
+replica_engines = [
+    create_engine(url, connect_args=connect_args, **pool_options)
+    for url in settings.READ_REPLICA_URLS
+]
+for replica in replica_engines:
+    instrument_queries(replica)
 
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
-    bind=engine
+    bind=engine,
+    **({"class_": routing_session_class(engine, replica_engines)} if replica_engines else {})
 )
 
 Base = declarative_base()
@@ -21,3 +51,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def pool_saturated():
+    """True when any primary pool (sync or the storefront's async one) is exhausted."""
+    checked_out = settings.SHED_POOL_CHECKED_OUT
+    wait_ms = settings.SHED_POOL_WAIT_MS
+    return any(
+        (checked_out > 0 and pool_engine.pool.checkedout() >= checked_out)
+        or (wait_ms > 0 and metrics.recent_wait * 1000 >= wait_ms)
+        for pool_engine, metrics in list(pools.values())
+    )
@@ -0,0 +1,157 @@
+import itertools
+import logging
+import queue
+import re
+import threading
+from collections import deque
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Plain reads only: EXPLAIN ANALYZE runs the statement for real
+READ_ONLY_RE = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+WRITE_RE = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b|\bFOR\s+(UPDATE|SHARE|NO KEY UPDATE)\b", re.IGNORECASE)
+ASYNCPG_PARAM_RE = re.compile(r"\$(\d+)")
+
+MAX_PENDING_EXPLAINS = 20
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Parameter types without their values, e.g. {"product_id_1": "str"}."""
+    if executemany and parameters:
+        return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _to_pyformat(statement: str, parameters):
+    """Rewrite an asyncpg ($1) statement for the psycopg2 side connection."""
+    if not isinstance(parameters, (list, tuple)) or not ASYNCPG_PARAM_RE.search(statement):
+        return statement, parameters
+    args = [parameters[int(n) - 1] for n in ASYNCPG_PARAM_RE.findall(statement)]
+    return ASYNCPG_PARAM_RE.sub("%s", statement.replace("%", "%%")), args
+
+
+class SlowQueryLog:
+    """
+    Bounded ring buffer of statements slower than the threshold.
+
+    Entries keep the statement, parameter types (never values), calling
+    route and duration. With explain on, read-only statements are queued
+    for EXPLAIN (ANALYZE, BUFFERS) on a separate NullPool connection in a
+    background thread; the request that ran the statement never waits
+    for it, and when the queue is full the explain is skipped.
+    """
+
+    def __init__(self, threshold_ms: int, size: int, explain: bool):
+        self.threshold = threshold_ms / 1000
+        self.explain = explain
+        self.entries = deque(maxlen=size)
+        self.recorded = 0
+        self._ids = itertools.count(1)
+        self._explain_queue = queue.Queue(maxsize=MAX_PENDING_EXPLAINS)
+        self._explain_thread = None
+        self._explain_engine = None
+        self._lock = threading.Lock()
+
+    def record(self, dialect: str, statement: str, parameters, executemany: bool, seconds: float, route: str | None):
+        if not self.threshold or seconds < self.threshold:
+            return
+
+        entry = {
+            "id": next(self._ids),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(seconds * 1000, 1),
+            "route": route,
+            "statement": " ".join(statement.split()),
+            "parameters": parameter_shape(parameters, executemany),
+            "explain": None
+        }
+        self.entries.append(entry)
+        self.recorded += 1
+
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s",
+            entry["duration_ms"], route or "-", entry["statement"][:500],
+            extra={k: entry[k] for k in ("duration_ms", "route", "parameters")}
+        )
+
+        if (
+            self.explain
+            and dialect == "postgresql"
+            and not executemany
+            and READ_ONLY_RE.match(statement)
+            and not WRITE_RE.search(statement)
+        ):
+            self._queue_explain(entry, statement, parameters)
+
+    def _queue_explain(self, entry, statement, parameters):
+        try:
+            self._explain_queue.put_nowait((entry, statement, parameters))
+        except queue.Full:
+            entry["explain"] = "skipped: explain queue full"
+            return
+        entry["explain"] = "pending"
+
+        with self._lock:
+            if self._explain_thread is None:
+                self._explain_thread = threading.Thread(
+                    target=self._explain_loop, name="slow-query-explain", daemon=True
+                )
+                self._explain_thread.start()
+
+    def _explain_loop(self):
+        while True:
+            entry, statement, parameters = self._explain_queue.get()
+            try:
+                entry["explain"] = self._run_explain(statement, parameters)
+            except Exception as e:
+                entry["explain"] = f"failed: {e}"
+
+    def _run_explain(self, statement, parameters):
+        if self._explain_engine is None:
+            self._explain_engine = create_engine(
+                settings.DATABASE_URL,
+                poolclass=NullPool,
+                connect_args={"options": f"-c statement_timeout={settings.SLOW_QUERY_EXPLAIN_TIMEOUT_MS}"}
+            )
+
+        statement, parameters = _to_pyformat(statement, parameters)
+        connection = self._explain_engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+            plan = "\n".join(row[0] for row in cursor.fetchall())
+            cursor.close()
+            return plan
+        finally:
+            # Never keep anything the statement may have done
+            connection.rollback()
+            connection.close()
+
+    def snapshot(self, limit: int | None = None):
+        entries = list(self.entries)[::-1]
+        return {
+            "threshold_ms": round(self.threshold * 1000),
+            "explain": self.explain,
+            "recorded": self.recorded,
+            "queries": entries[:limit] if limit else entries
+        }
+
+    def clear(self):
+        self.entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS,
+    size=settings.SLOW_QUERY_LOG_SIZE,
+    explain=settings.SLOW_QUERY_EXPLAIN
+)
@@ -1,17 +1,104 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 
 from app.routes.user_routes import router as user_router
 from app.routes.admin_routes import router as admin_router
 
 from app.db.init_db import reset_database
+from app.db.session import pool_saturated
+from app.core.config import settings
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.admission import AdmissionControlMiddleware
+from app.db.routing import ClientContextMiddleware
+from app.core.invalidation import invalidation_enabled, listen_for_invalidations
+from app.core.catalog_snapshot import start_catalog_builder
+from app.core.warmup import warm_up, warmup_state
+from app.db.query_stats import QueryStatsMiddleware, n_plus_one_detection_enabled
+from app.core.http_metrics import HTTPMetricsMiddleware, http_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.memory import MemoryTrackingMiddleware
+from app.core.logging_config import setup_logging
+
+setup_logging()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    listener = None
+    if invalidation_enabled():
+        listener = asyncio.create_task(listen_for_invalidations())
+    start_catalog_builder()
+
+    # In the background so the port opens right away; /ready gates traffic
+    warmup = None
+    if settings.WARMUP_ENABLED:
+        warmup = asyncio.create_task(warm_up())
+    else:
+        warmup_state.ready = True
 
-app = FastAPI(title="Wholesale Stationery API")
+    yield
+
+    if warmup and not warmup.done():
+        # Cancelling mid-connect strands half-open connections; give it a moment first
+        await asyncio.wait([warmup], timeout=5)
+        warmup.cancel()
+    if listener:
+        listener.cancel()
+        try:
+            await listener
+        except asyncio.CancelledError:
+            pass
+
+
+app = FastAPI(title="Wholesale Stationery API", lifespan=lifespan)
 
 # ⚠️ RUN ONLY ON FIRST DEPLOY
 # reset_database()        
 
+# A no-op until memory tracing is started from /admin/diagnostics/memory
+app.add_middleware(MemoryTrackingMiddleware)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware, interval=settings.PROFILE_INTERVAL_MS / 1000)
+
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(
+        QueryStatsMiddleware,
+        detect_n_plus_one=n_plus_one_detection_enabled(),
+        threshold=settings.QUERY_N_PLUS_ONE_THRESHOLD,
+    )
+
+if settings.READ_REPLICA_URLS:
+    app.add_middleware(ClientContextMiddleware)
+
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        capacities=settings.ADMISSION_CAPACITY,
+        routes=settings.ADMISSION_ROUTES,
+        default_class=settings.ADMISSION_DEFAULT_CLASS,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    )
+
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        groups=settings.RATE_LIMIT_GROUPS,
+        max_in_flight=settings.MAX_IN_FLIGHT_REQUESTS,
+        is_saturated=pool_saturated,
+        sessions_per_ip=settings.RATE_LIMIT_SESSIONS_PER_IP,
+    )
+
+# Outside the limiters so shed requests and queueing time are measured too
+if settings.HTTP_METRICS_ENABLED:
+    app.add_middleware(HTTPMetricsMiddleware, router=app.router)
+
+# Added last so it wraps the limiter and 429/503s still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -28,3 +115,21 @@ app.mount("/static", StaticFiles(directory="app/static"), name="static")
 @app.get("/")
 def health():
     return {"status": "API running"}
+
+@app.get("/ready")
+def ready():
+    return JSONResponse(
+        status_code=200 if warmup_state.ready else 503,
+        content={"status": "ready" if warmup_state.ready else "warming up", **warmup_state.status()}
+    )
+
+# async: rendering must stay on the event loop that updates the metrics
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # Route and latency data is internal: no token configured, no endpoint
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(404, "Not Found")
+    supplied = request.headers.get("authorization", "").encode()
+    if not hmac.compare_digest(supplied, f"Bearer {settings.METRICS_TOKEN}".encode()):
+        raise HTTPException(401, "Invalid metrics token")
+    return PlainTextResponse(http_metrics.render(), media_type="text/plain; version=0.0.4")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from app.db.session import Base
 
@@ -15,3 +15,9 @@ class AdminActivityLog(Base):
     ip_address = Column(String(50))
     payload = Column(Text) 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # /admin/activity-logs pages newest first, optionally for one admin
+    __table_args__ = (
+        Index("idx_activity_log_created", "created_at"),
+        Index("idx_activity_log_admin_created", "admin_id", "created_at"),
+    )
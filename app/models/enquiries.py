@@ -1,7 +1,8 @@
 from sqlalchemy import (
-    Column, Integer, String, DateTime, Text, Boolean
+    Column, Integer, String, DateTime, Text, Boolean, Index, text
 )
 from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
 from app.db.session import Base
 
 
@@ -44,3 +45,31 @@ class Enquiry(Base):
         server_default=func.now(),
         onupdate=func.now()
     )
+
+    items = relationship("EnquiryItem", backref="enquiry")
+
+    # Admin listing indexes: every filter is paired with the
+    # (created_at, id) keyset so pages are index range scans.
+    # Partial on is_active since soft-deleted rows are never listed.
+    __table_args__ = (
+        Index(
+            "idx_enquiry_created_id",
+            "created_at", "id",
+            postgresql_where=text("is_active")
+        ),
+        Index(
+            "idx_enquiry_status_created_id",
+            "status", "created_at", "id",
+            postgresql_where=text("is_active")
+        ),
+        Index(
+            "idx_enquiry_email_created_id",
+            "email", "created_at", "id",
+            postgresql_where=text("is_active")
+        ),
+        Index(
+            "idx_enquiry_assigned_created_id",
+            "assigned_admin_id", "created_at", "id",
+            postgresql_where=text("is_active")
+        ),
+    )
@@ -1,24 +1,42 @@
+import anyio
+import io
 import json
 import os
 import uuid
+from datetime import datetime
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, Response, UploadFile
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session, selectinload
 
 from app.core.storage import BRAND_DIR, CATEGORY_DIR, PRODUCT_DIR
+from app.db import queries
+from app.db.pool_metrics import pool_status, pools
+from app.db.slow_queries import slow_query_log
+from app.core.profiling import profile_store
+from app.core.memory import memory_diagnostics
 from app.db.session import get_db
 from app.models.admin_users import AdminUser
-from app.core.security import verify_password
+from app.core.security import PasswordPoolBusy, password_pool, verify_password_async
+from app.core.rate_limit import TokenBucketLimiter, client_ip
 from app.core.jwt import create_access_token
-from app.core.security import hash_password
-from app.core.dependencies import admin_only, get_current_admin, super_admin_only
+from app.core.security import hash_password_async
+from app.core.dependencies import admin_only, get_current_admin, invalidate_admin_principal, super_admin_only
+from app.core.export import stream_csv
+from app.core.invalidation import notify_change
+from app.db.product_import import ProductImportError, import_products_csv
 from app.models.admin_activity_logs import AdminActivityLog
 from app.models.brand import Brand
 from app.models.categories import Category
+from app.models.enquiries import Enquiry
+from app.models.enquiry_items import EnquiryItem
 from app.models.products import Product
 from app.core.config import settings
 import logging
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import DataError, IntegrityError
 from sqlalchemy.sql import func
+from sqlalchemy import insert, select, text, update
 
 
 logger = logging.getLogger(__name__)
@@ -26,12 +44,6 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
-def get_client_ip(request: Request):
-    xff = request.headers.get("x-forwarded-for")
-    if xff:
-        return xff.split(",")[0].strip()
-    return request.client.host if request.client else None
-
 # def get_api_key(request: Request):
 #     return request.headers.get("api-key")
 
@@ -55,12 +67,12 @@ def log_admin_activity(
             endpoint=endpoint,
             method=method,
             description=description,
-            ip_address=get_client_ip(request),
+            ip_address=client_ip(request),
             payload=json.dumps(payload) if payload else None
         ))
         # db.commit()
     except Exception as e:
-        logger.error(f"Error logging admin activity: {e}")
+        logger.error("Error logging admin activity: %s", e)
         pass
 
 def snapshot(model, fields: list[str]):
@@ -69,6 +81,63 @@ def snapshot(model, fields: list[str]):
 def image_extension_valid(filename):
     return filename.split('.')[-1] in ['jpg', 'jpeg', 'png', 'webp', 'avif']
 
+class BulkStatusUpdate(BaseModel):
+    ids: list[str]
+    is_active: bool
+
+def bulk_set_active(db: Session, key, ids: list[str], is_active: bool):
+    # One UPDATE for the whole id list; returns the ids that matched
+    return db.execute(
+        update(key.class_)
+        .where(key.in_(ids))
+        .values(is_active=is_active, modified_at=func.now())
+        .returning(key)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+def disable_category_tree(db: Session, category_ids: list[str]):
+    """
+    Disable the given categories, every descendant reached through
+    parent_id and all their products in a single statement.
+    Returns (category ids in the tree, ids that were active and are now
+    disabled, number of products disabled).
+    """
+    tree, categories, products = db.execute(text("""
+        WITH RECURSIVE tree AS (
+            SELECT category_id FROM categories WHERE category_id = ANY(:ids)
+            UNION
+            SELECT c.category_id FROM categories c
+            JOIN tree t ON c.parent_id = t.category_id
+        ), disabled_categories AS (
+            UPDATE categories SET is_active = false, modified_at = now()
+            WHERE category_id IN (SELECT category_id FROM tree) AND is_active
+            RETURNING category_id
+        ), disabled_products AS (
+            UPDATE products SET is_active = false, modified_at = now()
+            WHERE category_id IN (SELECT category_id FROM tree) AND is_active
+            RETURNING product_id
+        )
+        SELECT
+            (SELECT array_agg(category_id) FROM tree),
+            (SELECT array_agg(category_id) FROM disabled_categories),
+            (SELECT count(*) FROM disabled_products)
+    """), {"ids": category_ids}).one()
+    return tree or [], categories or [], products
+
+def disable_brands(db: Session, brand_ids: list[str]):
+    """
+    Disable the given brands and all their active products.
+    Returns (brand ids found, number of products disabled).
+    """
+    brands = bulk_set_active(db, Brand.brand_id, brand_ids, False)
+    products = db.execute(
+        update(Product)
+        .where(Product.brand_id.in_(brands), Product.is_active == True)
+        .values(is_active=False, modified_at=func.now())
+        .execution_options(synchronize_session=False)
+    ).rowcount if brands else 0
+    return brands, products
+
 
 
 # @router.post("/login")
@@ -101,28 +170,59 @@ def image_extension_valid(filename):
 #         }
 #     }
 
+login_username_limiter = TokenBucketLimiter(
+    rate=settings.LOGIN_ATTEMPTS_PER_USERNAME / 60,
+    capacity=settings.LOGIN_ATTEMPTS_PER_USERNAME
+)
+login_ip_limiter = TokenBucketLimiter(
+    rate=settings.LOGIN_ATTEMPTS_PER_IP / 60,
+    capacity=settings.LOGIN_ATTEMPTS_PER_IP
+)
+
 @router.post("/login")
-def admin_login(
+async def admin_login(
     request: Request,
     username: str,
     password: str,
     response: Response,
     db: Session = Depends(get_db)
 ):
-    print("Admin login")
-    admin = db.query(AdminUser).filter(
-        AdminUser.username == username,
-        AdminUser.is_active == True
-    ).first()
+    # Throttle before any DB or bcrypt work
+    ip = client_ip(request) or "unknown"
+    logger.info("Admin login attempt", extra={"username": username, "ip": ip})
+    if not login_ip_limiter.allow(ip):
+        raise HTTPException(429, "Too many login attempts", headers={"Retry-After": str(login_ip_limiter.retry_after())})
+    if not login_username_limiter.allow(username.lower()):
+        raise HTTPException(429, "Too many login attempts", headers={"Retry-After": str(login_username_limiter.retry_after())})
+
+    def load_admin():
+        admin = db.query(
+            AdminUser.id,
+            AdminUser.admin_id,
+            AdminUser.password_hash,
+            AdminUser.is_super_admin
+        ).filter(
+            AdminUser.username == username,
+            AdminUser.is_active == True
+        ).first()
+        # Hand the connection back to the pool while bcrypt runs
+        db.rollback()
+        return admin
+
+    admin = await run_in_threadpool(load_admin)
 
-    if not admin or not verify_password(password, admin.password_hash):
+    try:
+        valid = admin is not None and await verify_password_async(password, admin.password_hash)
+    except PasswordPoolBusy:
+        raise HTTPException(503, "Login temporarily unavailable", headers={"Retry-After": "1"})
+
+    if not valid:
         raise HTTPException(401, "Invalid credentials")
 
     token = create_access_token({
         "sub": admin.admin_id,
         "role": "super_admin" if admin.is_super_admin else "admin"
     })
-    admin.last_login_at = func.now()
 
     response.set_cookie(
         key="admin_token",
@@ -132,26 +232,165 @@ def admin_login(
         samesite="strict" if settings.ENV == "production" else "lax",
         max_age=60 * 60
     )
-    try:
-        log_admin_activity(
-            db=db,
-            admin=admin,
-            action="LOGIN",
-            module="Auth",
-            request=request,
-            endpoint="/admin/login",
-            method="POST",
-            description="Admin logged in",
-            
-        )
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error logging admin activity: {e}")
-        pass
+
+    def record_login():
+        try:
+            db.query(AdminUser).filter(AdminUser.id == admin.id).update(
+                {"last_login_at": func.now()},
+                synchronize_session=False
+            )
+            log_admin_activity(
+                db=db,
+                admin=admin,
+                action="LOGIN",
+                module="Auth",
+                request=request,
+                endpoint="/admin/login",
+                method="POST",
+                description="Admin logged in",
+
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error("Error logging admin activity: %s", e)
+            pass
+
+    await run_in_threadpool(record_login)
 
     return {"message": "Login successful","expires_in": 3600}
 
+@router.get("/metrics/db-pool")
+def db_pool_metrics(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    return {
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+            "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+            "pre_ping": settings.DB_POOL_PRE_PING,
+            "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS
+        },
+        "pools": {name: pool_status(pool_engine, metrics) for name, (pool_engine, metrics) in pools.items()}
+    }
+
+@router.get("/metrics/login")
+def login_metrics(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    return {
+        "password_pool": password_pool.stats(),
+        "throttled": {
+            "ip": login_ip_limiter.stats(),
+            "username": login_username_limiter.stats()
+        }
+    }
+
+@router.get("/metrics/slow-queries")
+def slow_queries(
+    request: Request,
+    limit: int = 50,
+    admin=Depends(super_admin_only)
+):
+    return slow_query_log.snapshot(limit=limit)
+
+@router.delete("/metrics/slow-queries")
+def clear_slow_queries(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
+
+@router.get("/profiles")
+def list_profiles(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    return profile_store.list()
+
+@router.get("/profiles/{name}")
+def download_profile(
+    name: str,
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    # Open in https://www.speedscope.app
+    return FileResponse(profile_store.path(name), media_type="application/json", filename=name)
+
+@router.get("/diagnostics/memory")
+def memory_status(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    return memory_diagnostics.status()
+
+@router.post("/diagnostics/memory/start")
+def start_memory_tracing(
+    request: Request,
+    frames: int | None = None,
+    admin=Depends(super_admin_only)
+):
+    memory_diagnostics.start(frames)
+    return memory_diagnostics.status()
+
+@router.post("/diagnostics/memory/stop")
+def stop_memory_tracing(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    memory_diagnostics.stop()
+    return memory_diagnostics.status()
+
+@router.post("/diagnostics/memory/snapshots", status_code=201)
+def take_memory_snapshot(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    return memory_diagnostics.take_snapshot()
+
+@router.delete("/diagnostics/memory/snapshots")
+def clear_memory_snapshots(
+    request: Request,
+    admin=Depends(super_admin_only)
+):
+    memory_diagnostics.clear_snapshots()
+    return {"message": "Memory snapshots cleared"}
+
+@router.get("/diagnostics/memory/top")
+def memory_top(
+    request: Request,
+    snapshot: int | None = None,
+    group_by: str = "lineno",
+    limit: int = 25,
+    admin=Depends(super_admin_only)
+):
+    return memory_diagnostics.top(snapshot, group_by, limit)
+
+@router.get("/diagnostics/memory/diff")
+def memory_diff(
+    request: Request,
+    base: int,
+    compare: int | None = None,
+    group_by: str = "lineno",
+    limit: int = 25,
+    admin=Depends(super_admin_only)
+):
+    # compare defaults to the latest snapshot
+    return memory_diagnostics.diff(base, compare, group_by, limit)
+
+@router.get("/diagnostics/memory/routes")
+def memory_route_peaks(
+    request: Request,
+    limit: int = 50,
+    admin=Depends(super_admin_only)
+):
+    return memory_diagnostics.route_peaks(limit)
+
 @router.post("/admins", status_code=201)
 def create_admin(
     request: Request,
@@ -182,7 +421,7 @@ def create_admin(
         
         admin = AdminUser(
             username=username,
-            password_hash=hash_password(password),
+            password_hash=anyio.from_thread.run(hash_password_async, password),
             email=email,
             role=role,
             is_super_admin=is_super_admin,
@@ -212,6 +451,9 @@ def create_admin(
         )
 
         db.commit()
+    except PasswordPoolBusy:
+        db.rollback()
+        raise HTTPException(503, "Server busy, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         db.rollback()
         # if image and os.path.exists(path):
@@ -229,7 +471,6 @@ def get_admins(
     db: Session = Depends(get_db),
     current_admin=Depends(super_admin_only)
 ):
-    print("Admins")
     return db.query(AdminUser).filter(AdminUser.is_active == True).all()
 
 @router.put("/admins/{admin_id}")
@@ -252,7 +493,7 @@ def update_admin(
     try:
         admin.username = username
         admin.email = email
-        admin.password = hash_password(password)
+        admin.password = anyio.from_thread.run(hash_password_async, password)
         admin.role = role
         admin.is_active = is_active
         admin.is_super_admin = is_super_admin
@@ -271,10 +512,15 @@ def update_admin(
                 'after': after
             }
         )
+        notify_change(db, "admin", admin_id)
         db.commit()
+    except PasswordPoolBusy:
+        db.rollback()
+        raise HTTPException(503, "Server busy, retry shortly", headers={"Retry-After": "1"})
     except Exception as e:
         db.rollback()
         raise HTTPException(500, str(e))
+    invalidate_admin_principal(admin_id)
     return {"message": "Admin updated"}
 
 
@@ -301,7 +547,9 @@ def disable_admin(
         method="POST",
         description=f"Disabled admin {admin.admin_id}",
     )
+    notify_change(db, "admin", admin_id)
     db.commit()
+    invalidate_admin_principal(admin_id)
     return {"message": "Admin disabled"}
 
 @router.put("/admins/{admin_id}/enable")
@@ -323,7 +571,9 @@ def enable_admin(
         method="POST",
         description=f"Enabled admin {admin.admin_id}",
     )
+    notify_change(db, "admin", admin_id)
     db.commit()
+    invalidate_admin_principal(admin_id)
     return {"message": "Admin enabled"}
 
 @router.delete("/admins/{admin_id}")
@@ -351,7 +601,9 @@ def delete_admin(
         }
     )
     db.delete(admin)
+    notify_change(db, "admin", admin_id)
     db.commit()
+    invalidate_admin_principal(admin_id)
     return {"message": "Admin deleted"}
 
 @router.post("/logout")
@@ -440,6 +692,7 @@ def create_category(
             payload={"after": after}
         )
 
+        notify_change(db, "category", category.category_id)
         db.commit()
 
     except IntegrityError:
@@ -453,7 +706,7 @@ def create_category(
 
     except Exception as e:
         db.rollback()
-        print(e)
+        logger.exception("Failed to create category")
         if os.path.exists(path):
             os.remove(path)
         raise HTTPException(
@@ -534,6 +787,7 @@ def update_category(
             }
 
         )
+        notify_change(db, "category", category_id)
         db.commit()
         if old:
             if os.path.exists(old):
@@ -556,6 +810,7 @@ def update_category(
 def disable_category(
     request: Request,
     category_id: str,
+    cascade: bool = False,
     db: Session = Depends(get_db),
     admin=Depends(admin_only)
 ):
@@ -563,6 +818,28 @@ def disable_category(
     if not category:
         raise HTTPException(404, "Category not found")
 
+    if cascade:
+        _, categories, products = disable_category_tree(db, [category_id])
+        log_admin_activity(
+            db = db,
+            admin=admin,
+            action="UPDATE",
+            module="Category",
+            request=request,
+            endpoint=f"/admin/categories/{category_id}/disable",
+            method="PUT",
+            description=f"Disabled category {category_id}: {len(categories)} categories and {products} products",
+            payload={"categories": categories, "products_disabled": products}
+        )
+        notify_change(db, "category", categories)
+        notify_change(db, "product")
+        db.commit()
+        return {
+            "message": "Category disabled",
+            "categories_disabled": len(categories),
+            "products_disabled": products
+        }
+
     category.is_active = False
     log_admin_activity(
         db = db,
@@ -574,6 +851,7 @@ def disable_category(
         method="POST",
         description=f"Disabled category {category.category_id}",
     )
+    notify_change(db, "category", category_id)
     db.commit()
     return {"message": "Category disabled"}
 
@@ -596,9 +874,51 @@ def enable_category(
         method="POST",
         description=f"Enabled category {category.category_id}",
     )
+    notify_change(db, "category", category_id)
     db.commit()
     return {"message": "Category enabled"}
 
+@router.put("/categories/bulk/status")
+def bulk_category_status(
+    request: Request,
+    body: BulkStatusUpdate,
+    cascade: bool = False,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not body.ids:
+        raise HTTPException(400, "No categories given")
+
+    products = 0
+    if cascade and not body.is_active:
+        found, categories, products = disable_category_tree(db, body.ids)
+    else:
+        found = categories = bulk_set_active(db, Category.category_id, body.ids, body.is_active)
+
+    not_found = sorted(set(body.ids) - set(found))
+    status = "Enabled" if body.is_active else "Disabled"
+    log_admin_activity(
+        db = db,
+        admin=admin,
+        action="UPDATE",
+        module="Category",
+        request=request,
+        endpoint="/admin/categories/bulk/status",
+        method="PUT",
+        description=f"{status} {len(categories)} categories and {products} products",
+        payload={"categories": categories, "products_disabled": products, "not_found": not_found}
+    )
+    notify_change(db, "category", categories)
+    if products:
+        notify_change(db, "product")
+    db.commit()
+    return {
+        "message": f"Categories {status.lower()}",
+        "categories": len(categories),
+        "products_disabled": products,
+        "not_found": not_found
+    }
+
 @router.delete("/categories/{category_id}")
 def delete_category(
     request: Request,
@@ -634,6 +954,7 @@ def delete_category(
                 "deleted": delete_cat
             }
         )
+        notify_change(db, "category", category_id)
         db.commit()
         if img and os.path.exists(img):
             os.remove(img)
@@ -688,6 +1009,7 @@ def create_brand(
                 "after": after
             }
         )
+        notify_change(db, "brand", brand.brand_id)
         db.commit()
     except IntegrityError:
         db.rollback()
@@ -760,6 +1082,7 @@ def update_brand(
             }
         )
 
+        notify_change(db, "brand", brand_id)
         db.commit()
         if old:
             if os.path.exists(old):
@@ -783,6 +1106,7 @@ def update_brand(
 def disable_brand(
     request: Request,
     brand_id: str,
+    cascade: bool = False,
     db: Session = Depends(get_db),
     admin=Depends(admin_only)
 ):
@@ -790,6 +1114,24 @@ def disable_brand(
     if not brand:
         raise HTTPException(404, "Brand not found")
 
+    if cascade:
+        _, products = disable_brands(db, [brand_id])
+        log_admin_activity(
+            db = db,
+            admin=admin,
+            action="UPDATE",
+            module="Brand",
+            request=request,
+            endpoint=f"/admin/brands/{brand_id}/disable",
+            method="PUT",
+            description=f"Disabled brand {brand_id} and {products} products",
+            payload={"brand": brand_id, "products_disabled": products}
+        )
+        notify_change(db, "brand", brand_id)
+        notify_change(db, "product")
+        db.commit()
+        return {"message": "Brand disabled", "products_disabled": products}
+
     brand.is_active = False
     log_admin_activity(
         db = db,
@@ -801,6 +1143,7 @@ def disable_brand(
         method="PUT",
         description=f"Disabled brand {brand.brand_id}"
     )
+    notify_change(db, "brand", brand_id)
     db.commit()
     return {"message": "Brand disabled"}
 
@@ -823,9 +1166,51 @@ def enable_brand(
         method="PUT",
         description=f"Enabled brand {brand.brand_id}",
     )
+    notify_change(db, "brand", brand_id)
     db.commit()
     return {"message": "Brand enabled"}
 
+@router.put("/brands/bulk/status")
+def bulk_brand_status(
+    request: Request,
+    body: BulkStatusUpdate,
+    cascade: bool = False,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not body.ids:
+        raise HTTPException(400, "No brands given")
+
+    products = 0
+    if cascade and not body.is_active:
+        brands, products = disable_brands(db, body.ids)
+    else:
+        brands = bulk_set_active(db, Brand.brand_id, body.ids, body.is_active)
+
+    not_found = sorted(set(body.ids) - set(brands))
+    status = "Enabled" if body.is_active else "Disabled"
+    log_admin_activity(
+        db = db,
+        admin=admin,
+        action="UPDATE",
+        module="Brand",
+        request=request,
+        endpoint="/admin/brands/bulk/status",
+        method="PUT",
+        description=f"{status} {len(brands)} brands and {products} products",
+        payload={"brands": brands, "products_disabled": products, "not_found": not_found}
+    )
+    notify_change(db, "brand", brands)
+    if products:
+        notify_change(db, "product")
+    db.commit()
+    return {
+        "message": f"Brands {status.lower()}",
+        "brands": len(brands),
+        "products_disabled": products,
+        "not_found": not_found
+    }
+
 @router.delete("/brands/{brand_id}")
 def delete_brand(
     request: Request,
@@ -860,6 +1245,7 @@ def delete_brand(
                 "deleted": delete_brd
             }
         )
+        notify_change(db, "brand", brand_id)
         db.commit()
         if img and os.path.exists(img):
             os.remove(img)
@@ -972,6 +1358,7 @@ def create_product(
                 "after": after
             }
         )
+        notify_change(db, "product", product.product_id)
         db.commit()
                                             
 
@@ -987,6 +1374,148 @@ def create_product(
     }
 
 
+@router.post("/products/import")
+def import_products(
+    request: Request,
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not file.filename.lower().endswith(".csv"):
+        raise HTTPException(400, "Only CSV files are supported")
+
+    try:
+        result = import_products_csv(
+            db,
+            io.TextIOWrapper(file.file, encoding="utf-8", newline=""),
+            admin_id=admin.admin_id,
+            ip_address=client_ip(request),
+            filename=file.filename
+        )
+    except ProductImportError as e:
+        raise HTTPException(400, detail={"message": "Import rejected", "errors": e.errors})
+    except IntegrityError:
+        raise HTTPException(400, "Import conflicts with existing products")
+    except DataError:
+        raise HTTPException(400, "Import contains values the products table cannot store")
+    except Exception:
+        logger.exception("Product import failed")
+        raise HTTPException(500, "Product import failed")
+
+    return {"message": "Products imported", **result}
+
+
+MAX_BULK_ROWS = 5000
+
+class BulkProductUpdate(BaseModel):
+    product_id: str
+    price: float | None = None
+    mrp: float | None = None
+    stock: int | None = None
+
+@router.put("/products/bulk")
+def bulk_update_products(
+    request: Request,
+    updates: list[BulkProductUpdate],
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not updates:
+        raise HTTPException(400, "No updates given")
+    if len(updates) > MAX_BULK_ROWS:
+        raise HTTPException(400, f"At most {MAX_BULK_ROWS} rows per request")
+
+    errors = []
+    seen = set()
+    for u in updates:
+        if u.product_id in seen:
+            errors.append({"product_id": u.product_id, "error": "Duplicate product"})
+        seen.add(u.product_id)
+        if u.price is None and u.mrp is None and u.stock is None:
+            errors.append({"product_id": u.product_id, "error": "Nothing to update"})
+        if (u.price is not None and u.price <= 0) or (u.mrp is not None and u.mrp <= 0):
+            errors.append({"product_id": u.product_id, "error": "Price and MRP must be positive"})
+        if u.stock is not None and u.stock < 0:
+            errors.append({"product_id": u.product_id, "error": "Stock cannot be negative"})
+    if errors:
+        raise HTTPException(400, detail={"message": "Invalid updates", "errors": errors})
+
+    params = {}
+    rows = []
+    for i, u in enumerate(updates):
+        params.update({f"id_{i}": u.product_id, f"price_{i}": u.price, f"mrp_{i}": u.mrp, f"stock_{i}": u.stock})
+        rows.append(f"(:id_{i}, CAST(:price_{i} AS numeric), CAST(:mrp_{i} AS numeric), CAST(:stock_{i} AS integer))")
+    values = f"(VALUES {', '.join(rows)}) AS v(product_id, price, mrp, stock)"
+
+    try:
+        # Lock the rows and check price <= MRP against the merged values
+        # for the whole batch in one query
+        current = db.execute(text(f"""
+            SELECT p.product_id, p.price, p.mrp, p.stock,
+                   COALESCE(v.price, p.price) > COALESCE(v.mrp, p.mrp) AS price_exceeds_mrp
+            FROM products p
+            JOIN {values} ON v.product_id = p.product_id
+            FOR UPDATE OF p
+        """), params).all()
+
+        found = {r.product_id: r for r in current}
+        errors = [
+            {"product_id": u.product_id, "error": "Product not found"}
+            for u in updates if u.product_id not in found
+        ] + [
+            {"product_id": r.product_id, "error": "Price cannot exceed MRP"}
+            for r in current if r.price_exceeds_mrp
+        ]
+        if errors:
+            db.rollback()
+            raise HTTPException(400, detail={"message": "Invalid updates", "errors": errors})
+
+        updated = db.execute(text(f"""
+            UPDATE products p SET
+                price = COALESCE(v.price, p.price),
+                mrp = COALESCE(v.mrp, p.mrp),
+                stock = COALESCE(v.stock, p.stock),
+                modified_at = now()
+            FROM {values}
+            WHERE p.product_id = v.product_id
+            RETURNING p.product_id, p.price, p.mrp, p.stock
+        """), params).all()
+
+        logs = []
+        for r in updated:
+            old = found[r.product_id]
+            before = {f: float(getattr(old, f)) if f != "stock" else old.stock for f in ["price", "mrp", "stock"]}
+            after = {f: float(getattr(r, f)) if f != "stock" else r.stock for f in ["price", "mrp", "stock"]}
+            changed = [f for f in before if before[f] != after[f]]
+            if not changed:
+                continue
+            logs.append({
+                "admin_id": admin.admin_id,
+                "action": "UPDATE",
+                "module": "Product",
+                "endpoint": "/admin/products/bulk",
+                "method": "PUT",
+                "description": f"Bulk updated product {r.product_id}",
+                "ip_address": client_ip(request),
+                "payload": json.dumps({
+                    "before": {f: before[f] for f in changed},
+                    "after": {f: after[f] for f in changed}
+                })
+            })
+        if logs:
+            db.execute(insert(AdminActivityLog), logs)
+
+        notify_change(db, "product", [r.product_id for r in updated])
+        db.commit()
+    except HTTPException:
+        raise
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(500, str(e))
+
+    return {"message": "Products updated", "updated": len(updated), "changed": len(logs)}
+
+
 # @router.get("/products")
 # def list_products(
 #     db: Session = Depends(get_db),
@@ -1110,6 +1639,7 @@ def update_product(
                 
             }
         )
+        notify_change(db, "product", product_id)
         db.commit()
         # if product.image:
         if old:
@@ -1149,6 +1679,7 @@ def disable_product(
         method="PUT",
         description=f"Disabled product {product_id}"
     )
+    notify_change(db, "product", product_id)
     db.commit()
     return {"message": "Product disabled"}
 
@@ -1171,9 +1702,38 @@ def enable_product(
         method="PUT",
         description=f"Enabled product {product_id}"
     )
+    notify_change(db, "product", product_id)
     db.commit()
     return {"message": "Product enabled"}
 
+@router.put("/products/bulk/status")
+def bulk_product_status(
+    request: Request,
+    body: BulkStatusUpdate,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if not body.ids:
+        raise HTTPException(400, "No products given")
+
+    products = bulk_set_active(db, Product.product_id, body.ids, body.is_active)
+    not_found = sorted(set(body.ids) - set(products))
+    status = "Enabled" if body.is_active else "Disabled"
+    log_admin_activity(
+        db = db,
+        admin=admin,
+        action="UPDATE",
+        module="Product",
+        request=request,
+        endpoint="/admin/products/bulk/status",
+        method="PUT",
+        description=f"{status} {len(products)} products",
+        payload={"products": products, "not_found": not_found}
+    )
+    notify_change(db, "product", products)
+    db.commit()
+    return {"message": f"Products {status.lower()}", "products": len(products), "not_found": not_found}
+
 @router.delete("/products/{product_id}")
 def delete_product(
     request: Request,
@@ -1208,6 +1768,7 @@ def delete_product(
                 "deleted": delete_prd
             }
         )
+        notify_change(db, "product", product_id)
         db.commit()
         if img and os.path.exists(img):
                 os.remove(img)
@@ -1251,33 +1812,291 @@ def list_admin_activity_logs(
     action: str | None = None,
     limit: int = 20,
     offset: int = 0,
+    with_total: bool = False,
     db: Session = Depends(get_db),
     admin=Depends(admin_only)
 ):
-    query = db.query(AdminActivityLog)
+    if limit <= 0 or limit > 100:
+        raise HTTPException(400, "Limit must be between 1 and 100")
+    if offset < 0:
+        raise HTTPException(400, "Offset must not be negative")
+
+    # The builder fetches one extra row to tell whether there is a next page.
+    logs = db.scalars(queries.activity_logs_page(
+        admin_id=admin_id, module=module, action=action, limit=limit, offset=offset
+    )).all()
 
-    if admin_id:
-        query = query.filter(AdminActivityLog.admin_id == admin_id)
+    response = {
+        "limit": limit,
+        "offset": offset,
+        "has_more": len(logs) > limit,
+        "logs": logs[:limit]
+    }
+
+    # Opt-in: counting reads every matching row, while the page itself
+    # is a short walk down idx_activity_log_created
+    if with_total:
+        response["total"] = db.scalar(queries.activity_logs_count(
+            admin_id=admin_id, module=module, action=action
+        ))
 
-    if module:
-        query = query.filter(AdminActivityLog.module == module)
+    return response
 
-    if action:
-        query = query.filter(AdminActivityLog.action == action)
 
-    total = query.count()
+# ==========================================================
+# ENQUIRIES
+# ==========================================================
 
-    logs = (
-        query.order_by(AdminActivityLog.created_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
-    )
+ENQUIRY_STATUSES = ["NEW", "CONTACTED", "QUOTED", "CLOSED", "CANCELLED"]
+
+def enquiry_to_dict(e: Enquiry):
+    return {
+        "id": e.id,
+        "customer_name": e.customer_name,
+        "email": e.email,
+        "phone": e.phone,
+        "address": e.address,
+        "status": e.status,
+        "assigned_admin_id": e.assigned_admin_id,
+        "admin_notes": e.admin_notes,
+        "created_at": e.created_at,
+        "modified_at": e.modified_at,
+        "items": [
+            {
+                "product_id": i.product_id,
+                "product_name": i.product_name,
+                "uom": i.uom,
+                "pack_size": i.pack_size,
+                "quantity": i.quantity,
+                "price": float(i.price),
+                "total_price": float(i.total_price)
+            }
+            for i in e.items if i.is_active
+        ]
+    }
+
+@router.get("/enquiries")
+def list_enquiries(
+    request: Request,
+    status: str | None = None,
+    email: str | None = None,
+    assigned_admin_id: int | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    cursor_created_at: datetime | None = None,
+    cursor_id: int | None = None,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    if limit <= 0 or limit > 100:
+        raise HTTPException(400, "Limit must be between 1 and 100")
+    if (cursor_created_at is None) != (cursor_id is None):
+        raise HTTPException(400, "cursor_created_at and cursor_id go together")
+
+    enquiries = db.scalars(
+        queries.enquiries_page(
+            status=status,
+            email=email,
+            assigned_admin_id=assigned_admin_id,
+            date_from=date_from,
+            date_to=date_to,
+            cursor=(cursor_created_at, cursor_id) if cursor_created_at is not None else None,
+            limit=limit
+        ).options(selectinload(Enquiry.items))
+    ).all()
+
+    next_cursor = None
+    if len(enquiries) == limit:
+        last = enquiries[-1]
+        next_cursor = {"cursor_created_at": last.created_at, "cursor_id": last.id}
 
     return {
-        "total": total,
         "limit": limit,
-        "offset": offset,
-        "logs": logs
+        "next_cursor": next_cursor,
+        "enquiries": [enquiry_to_dict(e) for e in enquiries]
     }
 
+@router.get("/enquiries/{enquiry_id}")
+def get_enquiry(
+    request: Request,
+    enquiry_id: int,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    enquiry = (
+        db.query(Enquiry)
+        .options(selectinload(Enquiry.items))
+        .filter(Enquiry.id == enquiry_id, Enquiry.is_active == True)
+        .first()
+    )
+    if not enquiry:
+        raise HTTPException(404, "Enquiry not found")
+
+    return enquiry_to_dict(enquiry)
+
+@router.put("/enquiries/{enquiry_id}")
+def update_enquiry(
+    request: Request,
+    enquiry_id: int,
+    status: str | None = None,
+    assigned_admin_id: int | None = None,
+    admin_notes: str | None = None,
+    db: Session = Depends(get_db),
+    admin=Depends(admin_only)
+):
+    enquiry = db.query(Enquiry).filter(
+        Enquiry.id == enquiry_id,
+        Enquiry.is_active == True
+    ).first()
+    if not enquiry:
+        raise HTTPException(404, "Enquiry not found")
+
+    if status is not None and status.upper() not in ENQUIRY_STATUSES:
+        raise HTTPException(400, "Invalid enquiry status")
+
+    if assigned_admin_id is not None and not db.query(AdminUser).filter(
+        AdminUser.id == assigned_admin_id,
+        AdminUser.is_active == True
+    ).first():
+        raise HTTPException(400, "Invalid admin")
+
+    before = snapshot(enquiry, ["id", "status", "assigned_admin_id", "admin_notes"])
+    try:
+        if status is not None:
+            enquiry.status = status.upper()
+        if assigned_admin_id is not None:
+            enquiry.assigned_admin_id = assigned_admin_id
+        if admin_notes is not None:
+            enquiry.admin_notes = admin_notes
+        after = snapshot(enquiry, ["id", "status", "assigned_admin_id", "admin_notes"])
+        log_admin_activity(
+            db = db,
+            admin=admin,
+            action="UPDATE",
+            module="Enquiry",
+            request=request,
+            endpoint=f"/admin/enquiries/{enquiry_id}",
+            method="PUT",
+            description=f"Updated enquiry {enquiry_id}",
+            payload={
+                "before": before,
+                "after": after
+            }
+        )
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(500, str(e))
+
+    return {"message": "Enquiry updated"}
+
+
+# ==========================================================
+# EXPORTS (streamed CSV)
+# ==========================================================
+
+def csv_response(filename: str, chunks):
+    return StreamingResponse(
+        chunks,
+        media_type="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/export/enquiries")
+def export_enquiries(
+    request: Request,
+    status: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    admin=Depends(admin_only)
+):
+    def build_query():
+        query = (
+            select(Enquiry, EnquiryItem)
+            # Soft-deleted items stay out, as in enquiry_to_dict
+            .outerjoin(EnquiryItem, (EnquiryItem.enquiry_id == Enquiry.id) & (EnquiryItem.is_active == True))
+            .where(Enquiry.is_active == True)
+        )
+        if status:
+            query = query.where(Enquiry.status == status.upper())
+        if date_from:
+            query = query.where(Enquiry.created_at >= date_from)
+        if date_to:
+            query = query.where(Enquiry.created_at < date_to)
+        return query.order_by(Enquiry.created_at, Enquiry.id, EnquiryItem.id)
+
+    def to_row(e, i):
+        return [
+            e.id, e.customer_name, e.email, e.phone, e.address, e.status,
+            e.assigned_admin_id, e.created_at,
+            i.product_id if i else None,
+            i.product_name if i else None,
+            i.quantity if i else None,
+            i.price if i else None,
+            i.total_price if i else None
+        ]
+
+    header = [
+        "enquiry_id", "customer_name", "email", "phone", "address", "status",
+        "assigned_admin_id", "created_at",
+        "product_id", "product_name", "quantity", "price", "total_price"
+    ]
+    return csv_response("enquiries.csv", stream_csv(header, build_query(), to_row))
+
+@router.get("/export/products")
+def export_products(
+    request: Request,
+    is_active: bool | None = None,
+    admin=Depends(admin_only)
+):
+    fields = [
+        "product_id", "category_id", "brand_id", "name", "description", "sku",
+        "mrp", "price", "pack_size", "uom", "min_order_qty", "stock",
+        "hsn_code", "tax_percent", "is_featured", "is_active", "created_at"
+    ]
+
+    def build_query():
+        query = select(Product)
+        if is_active is not None:
+            query = query.where(Product.is_active == is_active)
+        return query.order_by(Product.id)
+
+    def to_row(p):
+        return [getattr(p, field) for field in fields]
+
+    return csv_response("products.csv", stream_csv(fields, build_query(), to_row))
+
+@router.get("/export/activity-logs")
+def export_activity_logs(
+    request: Request,
+    admin_id: str | None = None,
+    module: str | None = None,
+    action: str | None = None,
+    date_from: datetime | None = None,
+    date_to: datetime | None = None,
+    admin=Depends(admin_only)
+):
+    fields = [
+        "id", "admin_id", "action", "module", "endpoint", "method",
+        "description", "ip_address", "payload", "created_at"
+    ]
+
+    def build_query():
+        query = select(AdminActivityLog)
+        if admin_id:
+            query = query.where(AdminActivityLog.admin_id == admin_id)
+        if module:
+            query = query.where(AdminActivityLog.module == module)
+        if action:
+            query = query.where(AdminActivityLog.action == action)
+        if date_from:
+            query = query.where(AdminActivityLog.created_at >= date_from)
+        if date_to:
+            query = query.where(AdminActivityLog.created_at < date_to)
+        return query.order_by(AdminActivityLog.id)
+
+    def to_row(log):
+        return [getattr(log, field) for field in fields]
+
+    return csv_response("activity_logs.csv", stream_csv(fields, build_query(), to_row))
@@ -2,6 +2,7 @@
 # USER API – SINGLE FILE (CART + CHECKOUT) – FIXED
 # ==========================================================
 
+import logging
 import os
 import uuid
 from fastapi import (
@@ -11,11 +12,13 @@ from fastapi import (
     Request,
     Response
 )
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, select
 
 # ================= DB =================
-from app.db.session import get_db
+from app.db import queries
+from app.db.async_session import get_async_db
 
 # ================= MODELS =================
 from app.models.categories import Category
@@ -25,6 +28,8 @@ from app.models.products import Product
 from app.models.cart import Cart
 from app.models.enquiries import Enquiry
 from app.models.enquiry_items import EnquiryItem
+from app.core.catalog_snapshot import current_catalog
+from app.core.invalidation import notify_change_async
 from app.core.send_mail import send_mail
 from app.core.config import settings
 from app.core.storage import CATEGORY_DIR, PRODUCT_DIR, BRAND_DIR
@@ -32,6 +37,8 @@ from app.models.user_visits import UserVisit
 
 router = APIRouter(prefix="/user", tags=["User"])
 
+logger = logging.getLogger(__name__)
+
 # ==========================================================
 # 🔐 COOKIE BASED SESSION (1 DAY)
 # ==========================================================
@@ -55,7 +62,7 @@ def get_user_session(request: Request, response: Response):
 # USER VISIT LOGGER (UserVisit TABLE)
 # ==========================================================
 
-def log_user_visit(db: Session, request: Request, session_id: str):
+async def log_user_visit(db: AsyncSession, request: Request, session_id: str):
     try:
         db.add(UserVisit(
             session_id=session_id,
@@ -67,21 +74,11 @@ def log_user_visit(db: Session, request: Request, session_id: str):
             browser=request.headers.get("user-agent"),
             os=request.headers.get("user-agent")
         ))
-        print(
-            session_id,
-            request.client.host if request.client else None,
-            request.headers.get("user-agent"),
-            request.url.path,
-            request.headers.get("referer"),
-            "mobile" if "Mobile" in (request.headers.get("user-agent") or "") else "desktop",
-            request.headers.get("user-agent"),
-            request.headers.get("user-agent")
-        )
-        print("User visit logged successfully")
-        db.commit()
+        await db.commit()
+        logger.debug("User visit", extra={"session_id": session_id, "visited_page": request.url.path})
     except Exception:
-        print("Error logging user visit")
-        db.rollback()
+        logger.exception("Error logging user visit")
+        await db.rollback()
 
 # ==========================================================
 # DELIVERY RULE
@@ -102,9 +99,14 @@ def img(path, image):
 # ==========================================================
 
 @router.get("/categories")
-def list_categories(request: Request, response: Response, db: Session = Depends(get_db)):
+async def list_categories(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     session_id = get_user_session(request, response)
-    log_user_visit(db, request, session_id)
+    await log_user_visit(db, request, session_id)
+
+    catalog = current_catalog()
+    categories = catalog.categories() if catalog else (await db.execute(
+        select(Category).where(Category.is_active == True)
+    )).scalars()
 
     return [
         {
@@ -113,20 +115,23 @@ def list_categories(request: Request, response: Response, db: Session = Depends(
             "description": c.description,
             "image": os.path.join(CATEGORY_DIR, c.image)
         }
-        for c in db.query(Category).filter(Category.is_active == True).all()
+        for c in categories
     ]
 
 @router.get("/categories/{category_id}/products")
-def products_by_category(
+async def products_by_category(
     category_id: str,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
-    log_user_visit(db, request, session_id)
+    await log_user_visit(db, request, session_id)
 
-    products = db.query(Product).filter(Product.category_id == category_id, Product.is_active == True).all()
+    catalog = current_catalog()
+    products = catalog.products_by_category(category_id) if catalog else (await db.execute(
+        queries.category_products(category_id)
+    )).scalars().all()
 
     return [
         {
@@ -143,8 +148,11 @@ def products_by_category(
     ]
 
 @router.get("/brands")
-def list_brands(db: Session = Depends(get_db)):
-    brands = db.query(Brand).filter(Brand.is_active == True).all()
+async def list_brands(db: AsyncSession = Depends(get_async_db)):
+    catalog = current_catalog()
+    brands = catalog.brands() if catalog else (await db.execute(
+        select(Brand).where(Brand.is_active == True)
+    )).scalars().all()
     return [
         {
             "brand_id": b.brand_id,
@@ -156,15 +164,18 @@ def list_brands(db: Session = Depends(get_db)):
 
 
 @router.get("/brands/{brand_id}/products")
-def products_by_brand(
+async def products_by_brand(
     brand_id: str,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
-    log_user_visit(db, request, session_id)
-    products_by_brand = db.query(Product).filter(Product.brand_id == brand_id, Product.is_active == True).all()
+    await log_user_visit(db, request, session_id)
+    catalog = current_catalog()
+    products_by_brand = catalog.products_by_brand(brand_id) if catalog else (await db.execute(
+        queries.brand_products(brand_id)
+    )).scalars().all()
 
     return [
         {
@@ -178,12 +189,40 @@ def products_by_brand(
         }for p in products_by_brand
     ]
 
+# Declared before /products/{product_id}, which would otherwise capture it
+@router.get("/products/search")
+async def search_products(
+    q: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
+    session_id = get_user_session(request, response)
+    await log_user_visit(db, request, session_id)
+
+    products = (await db.execute(queries.search_products(q))).scalars().all()
+
+    return [
+        {
+            "product_id": p.product_id,
+            "name": p.name,
+            "description": p.description,
+            "mrp": float(p.mrp),
+            "price": float(p.price),
+            "image": os.path.join(PRODUCT_DIR, p.image)
+        }
+        for p in products
+    ]
+
 @router.get("/products/{product_id}")
-def product_details(product_id: str, db: Session = Depends(get_db)):
-    product = db.query(Product).filter(
-        Product.product_id == product_id,
-        Product.is_active == True
-    ).first()
+async def product_details(product_id: str, db: AsyncSession = Depends(get_async_db)):
+    catalog = current_catalog()
+    product = catalog.product(product_id) if catalog else (await db.execute(
+        select(Product).where(
+            Product.product_id == product_id,
+            Product.is_active == True
+        )
+    )).scalars().first()
 
     if not product:
         raise HTTPException(404, "Product not found")
@@ -203,9 +242,20 @@ def product_details(product_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/products")
-def list_products(request: Request, response: Response, db: Session = Depends(get_db)):
+async def list_products(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     session_id = get_user_session(request, response)
-    log_user_visit(db, request, session_id)
+    await log_user_visit(db, request, session_id)
+
+    catalog = current_catalog()
+    rows = (
+        ((p, p.category_name, p.brand_name) for p in catalog.products()) if catalog
+        else await db.execute(
+            select(Product, Category.name, Brand.name)
+            .join(Category, Category.category_id == Product.category_id)
+            .join(Brand, Brand.brand_id == Product.brand_id)
+            .where(Product.is_active == True)
+        )
+    )
 
     return [
         {
@@ -216,71 +266,23 @@ def list_products(request: Request, response: Response, db: Session = Depends(ge
             "price": float(p.price),
             "min_order_qty": p.min_order_qty,
             "stock": p.stock,
-            "category_id": db.query(Category).filter(Category.category_id == p.category_id).first().name if p.category_id else p.category_id,
-            "brand_id": db.query(Brand).filter(Brand.brand_id == p.brand_id).first().name if p.brand_id else p.brand_id,
+            "category_id": category_name,
+            "brand_id": brand_name,
             "price": float(p.price),
             "image": os.path.join(PRODUCT_DIR, p.image)
         }
-        for p in db.query(Product).filter(Product.is_active == True).all()
-    ]
-
-@router.get("/products/search")
-def search_products(
-    q: str,
-    request: Request,
-    response: Response,
-    db: Session = Depends(get_db)
-):
-    session_id = get_user_session(request, response)
-    log_user_visit(db, request, session_id)
-
-    products = (
-        db.query(Product)
-        .join(Category)
-        .join(Brand)
-        .filter(
-            Product.is_active == True,
-            or_(
-                Product.name.ilike(f"%{q}%"),
-                Product.description.ilike(f"%{q}%"),
-                Category.name.ilike(f"%{q}%"),
-                Brand.name.ilike(f"%{q}%")
-            )
-        ).all()
-    )
-
-    return [
-        {
-            "product_id": p.product_id,
-            "name": p.name,
-            "description": p.description,
-            "mrp": float(p.mrp),
-            "price": float(p.price),
-            "image": os.path.join(PRODUCT_DIR, p.image)
-        }
-        for p in products
+        for p, category_name, brand_name in rows
     ]
 
 @router.post("/products/filter")
-def filter_products(filters: dict, db: Session = Depends(get_db)):
-    query = db.query(Product).filter(Product.is_active == True)
-
-    if filters.get("category_ids"):
-        query = query.filter(Product.category_id.in_(filters["category_ids"]))
-
-    if filters.get("brand_ids"):
-        query = query.filter(Product.brand_id.in_(filters["brand_ids"]))
-
-    if filters.get("min_price") is not None:
-        query = query.filter(Product.price >= filters["min_price"])
-
-    if filters.get("max_price") is not None:
-        query = query.filter(Product.price <= filters["max_price"])
-
-    if filters.get("min_order_qty") is not None:
-        query = query.filter(Product.min_order_qty >= filters["min_order_qty"])
-
-    products = query.all()
+async def filter_products(filters: dict, db: AsyncSession = Depends(get_async_db)):
+    products = (await db.execute(queries.filter_products(
+        category_ids=filters.get("category_ids"),
+        brand_ids=filters.get("brand_ids"),
+        min_price=filters.get("min_price"),
+        max_price=filters.get("max_price"),
+        min_order_qty=filters.get("min_order_qty")
+    ))).scalars().all()
 
     return [
         {
@@ -294,22 +296,24 @@ def filter_products(filters: dict, db: Session = Depends(get_db)):
     ]
 
 @router.post("/cart/add")
-def add_to_cart(
+async def add_to_cart(
     product_id: str,
     qty: int = 1,
     request: Request = None,
     response: Response = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
 
     if qty <= 0:
         raise HTTPException(400, "Invalid quantity")
 
-    product = db.query(Product).filter(
-        Product.product_id == product_id,
-        Product.is_active == True
-    ).first()
+    product = (await db.execute(
+        select(Product).where(
+            Product.product_id == product_id,
+            Product.is_active == True
+        )
+    )).scalars().first()
 
     if not product:
         raise HTTPException(404, "Product not found")
@@ -317,10 +321,12 @@ def add_to_cart(
     if qty < product.min_order_qty:
         raise HTTPException(400, "Minimum order quantity not met")
 
-    item = db.query(Cart).filter(
-        Cart.session_id == session_id,
-        Cart.product_id == product_id
-    ).first()
+    item = (await db.execute(
+        select(Cart).where(
+            Cart.session_id == session_id,
+            Cart.product_id == product_id
+        )
+    )).scalars().first()
 
     if item:
         if item.quantity + qty > product.stock:
@@ -335,70 +341,69 @@ def add_to_cart(
             quantity=qty
         ))
 
-    db.commit()
-    log_user_visit(db, request, session_id)
+    await db.commit()
+    await log_user_visit(db, request, session_id)
 
     return {"message": "Item added to cart"}
 
 @router.put("/cart/decrease")
-def decrease_cart_item(
+async def decrease_cart_item(
     product_id: str,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
 
-    item = db.query(Cart).filter(
-        Cart.session_id == session_id,
-        Cart.product_id == product_id
-    ).first()
+    item = (await db.execute(
+        select(Cart).where(
+            Cart.session_id == session_id,
+            Cart.product_id == product_id
+        )
+    )).scalars().first()
 
     if not item:
         raise HTTPException(404, "Item not in cart")
 
     item.quantity -= 1
     if item.quantity <= 0:
-        db.delete(item)
+        await db.delete(item)
 
-    db.commit()
-    log_user_visit(db, request, session_id)
+    await db.commit()
+    await log_user_visit(db, request, session_id)
 
     return {"message": "Quantity updated"}
 
 @router.delete("/cart/remove")
-def remove_cart_item(
+async def remove_cart_item(
     product_id: str,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
 
-    db.query(Cart).filter(
-        Cart.session_id == session_id,
-        Cart.product_id == product_id
-    ).delete()
+    await db.execute(
+        delete(Cart).where(
+            Cart.session_id == session_id,
+            Cart.product_id == product_id
+        )
+    )
 
-    db.commit()
-    log_user_visit(db, request, session_id)
+    await db.commit()
+    await log_user_visit(db, request, session_id)
 
     return {"message": "Item removed"}
 
 @router.get("/cart")
-def view_cart(
+async def view_cart(
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
 
-    items = (
-        db.query(Cart, Product)
-        .join(Product, Cart.product_id == Product.product_id)
-        .filter(Cart.session_id == session_id)
-        .all()
-    )
+    items = (await db.execute(queries.cart_items(session_id))).all()
 
     cart = []
     subtotal = 0.0
@@ -429,23 +434,18 @@ def view_cart(
 # ✅ CHECKOUT
 # ==========================================================
 @router.post("/enquiry", status_code=201)
-def submit_enquiry(
+async def submit_enquiry(
     customer_name: str,
     email: str,
     phone: str,
     address: str,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     session_id = get_user_session(request, response)
 
-    items = (
-        db.query(Cart, Product)
-        .join(Product, Cart.product_id == Product.product_id)
-        .filter(Cart.session_id == session_id)
-        .all()
-    )
+    items = (await db.execute(queries.cart_items(session_id))).all()
 
     if not items:
         raise HTTPException(status_code=400, detail="Cart is empty")
@@ -475,12 +475,12 @@ def submit_enquiry(
             email=email,
             phone=phone,
             address=address,
-            subtotal=subtotal,
-            delivery=delivery,
-            grand_total=grand_total
+            session_id=session_id,
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent")
         )
         db.add(enquiry)
-        db.flush()  # get enquiry.id
+        await db.flush()  # get enquiry.id
 
         for c, p in items:
             if p.stock < c.quantity:
@@ -494,18 +494,28 @@ def submit_enquiry(
             db.add(EnquiryItem(
                 enquiry_id=enquiry.id,
                 product_id=p.product_id,
+                product_name=p.name,
+                uom=p.uom,
+                pack_size=str(p.pack_size),
                 quantity=c.quantity,
-                price=p.price
+                price=p.price,
+                total_price=p.price * c.quantity
             ))
 
-        db.query(Cart).filter(
-            Cart.session_id == session_id
-        ).delete()
+        await db.execute(
+            delete(Cart).where(Cart.session_id == session_id)
+        )
+
+        # Stock only: the catalog snapshot patches these records in place
+        await notify_change_async(db, "stock", [p.product_id for _, p in items])
 
-        db.commit()
+        await db.commit()
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
     # ---------- EMAIL TEMPLATES ----------
@@ -540,7 +550,7 @@ def submit_enquiry(
 
     # ---------- ADMIN EMAIL ----------
     try:
-        send_mail(settings.ADMIN_EMAIL, "New Enquiry", admin_html)
+        await run_in_threadpool(send_mail, settings.ADMIN_EMAIL, "New Enquiry", admin_html)
         admin_sent = True
     except Exception:
         admin_sent = False
@@ -550,11 +560,11 @@ def submit_enquiry(
         email_to=settings.ADMIN_EMAIL,
         sent_status=admin_sent
     ))
-    db.commit()
+    await db.commit()
 
     # ---------- USER EMAIL ----------
     try:
-        send_mail(email, "Enquiry Received", user_html)
+        await run_in_threadpool(send_mail, email, "Enquiry Received", user_html)
         user_sent = True
     except Exception:
         user_sent = False
@@ -564,7 +574,7 @@ def submit_enquiry(
         email_to=email,
         sent_status=user_sent
     ))
-    db.commit()
+    await db.commit()
 
     return {
         "message": "Enquiry submitted successfully",
@@ -0,0 +1,97 @@
+"""
+Measure how long `import app.main` takes and check it against a budget.
+
+Each run imports the app in a fresh interpreter with -X importtime and
+the best run is compared with --budget-ms, since the slower runs are
+mostly noise. Modules that are meant to load lazily (LAZY_MODULES) must
+not show up at import time at all. Exits 1 if either check fails.
+
+    python -m benchmarks.import_time --runs 5 --budget-ms 1300
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+TARGET = "app.main"
+
+# Loaded on first use / by the startup warm-up, never by importing the app
+LAZY_MODULES = ["sib_api_v3_sdk", "passlib", "jose"]
+
+
+def parse_importtime(stderr: str):
+    """
+    Rows of (module, self_us, cumulative_us) for TARGET and everything it
+    imported. Interpreter startup (site, encodings, .pth hooks) is left
+    out. Nested imports are listed before their parent, with deeper
+    indentation, so TARGET's subtree is everything after the previous
+    top-level row.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        self_us, cumulative_us, name = fields
+        top_level = len(name) - len(name.lstrip()) == 1
+        rows.append((name.strip(), int(self_us), int(cumulative_us), top_level))
+
+    end = next(i for i, row in enumerate(rows) if row[0] == TARGET and row[3])
+    start = max((i + 1 for i, row in enumerate(rows[:end]) if row[3]), default=0)
+    return [row[:3] for row in rows[start:end + 1]]
+
+
+def run_once():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {TARGET} failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=1300)
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to report")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    totals = [next(cum for name, _, cum in rows if name == TARGET) / 1000 for rows in runs]
+    best = min(range(len(runs)), key=lambda i: totals[i])
+
+    # Top-level packages by the time they pulled in (cumulative of their root module)
+    packages = {}
+    for name, _, cumulative_us in runs[best]:
+        root = name.split(".")[0]
+        if name == root:
+            packages[root] = max(packages.get(root, 0), cumulative_us)
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]
+
+    imported = {name for name, _, _ in runs[best]}
+    eager = [m for m in LAZY_MODULES if any(n == m or n.startswith(m + ".") for n in imported)]
+
+    ok = totals[best] <= args.budget_ms and not eager
+    print(json.dumps({
+        "config": vars(args),
+        "results": {
+            "import_ms": round(totals[best], 1),
+            "runs_ms": [round(t, 1) for t in totals],
+            "modules": len(imported),
+            "slowest_packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+            "eager_lazy_modules": eager,
+            "ok": ok
+        }
+    }, indent=2))
+
+    if not ok:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""
+Load test the storefront, cart/enquiry and admin flows end to end.
+
+With --reset the database at DATABASE_URL is wiped and a catalog of the
+requested size is seeded with app.db.seed_data (Postgres, or a SQLite
+file with aiosqlite from requirements-dev.txt); without it the run uses whatever is
+already there. Then
+--concurrency virtual users loop for --duration seconds, each drawing
+scenarios from --mix and keeping its own cookies, so carts and
+enquiries are per user. Requests go through the real app in-process
+(lifespan and middleware included) or, with --base-url, to a running
+server. Throughput and latency percentiles per scenario and step are
+printed and written to --output; --compare checks them against an
+earlier file and exits 1 if p95 latency or throughput is more than
+--tolerance-pct worse, or a scenario's error rate is more than
+--error-tolerance-pct points higher.
+
+--base-url leaves the target server's own settings alone: its per-IP
+rate limit stays on, and every virtual user comes from this one
+address, so start that server with RATE_LIMIT_ENABLED=false (or expect
+429s) when measuring it.
+
+    python -m benchmarks.load_test --reset --products 5000 --output baseline.json
+    python -m benchmarks.load_test --reset --products 5000 --compare baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+SCENARIOS = ["browse", "search", "filter", "cart", "enquiry", "admin"]
+DEFAULT_MIX = "browse=40,search=15,filter=10,cart=20,enquiry=5,admin=10"
+PERCENTILES = (50, 90, 95, 99)
+
+SEARCH_TERMS = ["notebook", "pen", "marker", "stapler", "folder", "premium", "eco", "brand 1"]
+
+# Enquiries below this grand total are rejected by the app
+MIN_ENQUIRY_TOTAL = 1300
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a sorted list."""
+    return values[max(math.ceil(p / 100 * len(values)) - 1, 0)]
+
+
+def summarize(latencies, errors, seconds):
+    latencies = sorted(latencies)
+    summary = {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 1)
+    }
+    if latencies:
+        for p in PERCENTILES:
+            summary[f"p{p}_ms"] = round(percentile(latencies, p) * 1000, 2)
+        summary["max_ms"] = round(latencies[-1] * 1000, 2)
+    return summary
+
+
+class Catalog:
+    """Ids the scenarios pick from."""
+
+    def __init__(self, categories, brands, products, admin_id):
+        self.categories = categories
+        self.brands = brands
+        # (product_id, price, min_order_qty)
+        self.products = products
+        self.admin_id = admin_id
+
+
+def load_catalog(engine, sample: int = 20_000):
+    """Active ids to drive the scenarios with; products with room for a run's enquiries."""
+    from sqlalchemy import select
+
+    from app.models.admin_users import AdminUser
+    from app.models.brand import Brand
+    from app.models.categories import Category
+    from app.models.products import Product
+
+    with engine.connect() as conn:
+        categories = conn.scalars(select(Category.category_id).where(Category.is_active == True)).all()
+        brands = conn.scalars(select(Brand.brand_id).where(Brand.is_active == True)).all()
+        products = [
+            (product_id, float(price), min_order_qty)
+            for product_id, price, min_order_qty in conn.execute(
+                select(Product.product_id, Product.price, Product.min_order_qty)
+                .where(Product.is_active == True, Product.stock >= 1000)
+                .order_by(Product.id)
+                .limit(sample)
+            )
+        ]
+        admin_id = conn.scalar(
+            select(AdminUser.admin_id).where(AdminUser.role == "super_admin", AdminUser.is_active == True).limit(1)
+        )
+
+    if not (categories and brands and products):
+        raise SystemExit("No active catalog to test against; run with --reset to seed one")
+    return Catalog(categories, brands, products, admin_id)
+
+
+class Run:
+    """Latencies per (scenario, step); only recorded once warm-up is over."""
+
+    def __init__(self):
+        self.recording = False
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.journeys = defaultdict(int)
+        self.error_samples = []
+
+    def record(self, scenario, step, seconds, error):
+        if not self.recording:
+            return
+        self.latencies[(scenario, step)].append(seconds)
+        if error:
+            self.errors[(scenario, step)] += 1
+            if len(self.error_samples) < 20:
+                self.error_samples.append({"scenario": scenario, "step": step, "error": error})
+
+    def results(self, seconds):
+        scenarios = {}
+        for scenario in SCENARIOS:
+            steps = {key[1]: key for key in self.latencies if key[0] == scenario}
+            if not steps:
+                continue
+            latencies = [s for key in steps.values() for s in self.latencies[key]]
+            errors = sum(self.errors[key] for key in steps.values())
+            scenarios[scenario] = {
+                **summarize(latencies, errors, seconds),
+                "journeys": self.journeys[scenario],
+                "steps": {
+                    step: summarize(self.latencies[key], self.errors[key], seconds)
+                    for step, key in sorted(steps.items())
+                }
+            }
+        everything = [s for values in self.latencies.values() for s in values]
+        return {
+            "total": summarize(everything, sum(self.errors.values()), seconds),
+            "scenarios": scenarios,
+            "error_samples": self.error_samples
+        }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, catalog: Catalog, run: Run, rng: random.Random):
+        self.client = client
+        self.catalog = catalog
+        self.run = run
+        self.rng = rng
+        self.scenario = None
+
+    async def request(self, step, method, url, expect=(200, 201), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            error = None if response.status_code in expect else f"{response.status_code} {response.text[:200]}"
+        except httpx.HTTPError as e:
+            response, error = None, f"{type(e).__name__}: {e}"
+        self.run.record(self.scenario, step, time.perf_counter() - started, error)
+        return response
+
+    def product(self):
+        return self.rng.choice(self.catalog.products)
+
+    async def browse(self):
+        await self.request("categories", "GET", "/user/categories")
+        category_id = self.rng.choice(self.catalog.categories)
+        await self.request("category_products", "GET", f"/user/categories/{category_id}/products")
+        for _ in range(2):
+            await self.request("product", "GET", f"/user/products/{self.product()[0]}")
+
+    async def search(self):
+        await self.request("search", "GET", "/user/products/search", params={"q": self.rng.choice(SEARCH_TERMS)})
+
+    async def filter(self):
+        low = self.rng.choice([0, 50, 100, 250, 500])
+        await self.request("filter", "POST", "/user/products/filter", json={
+            "category_ids": self.rng.sample(self.catalog.categories, min(3, len(self.catalog.categories))),
+            "min_price": low,
+            "max_price": low + self.rng.choice([100, 250, 500, 1000])
+        })
+
+    async def cart(self):
+        added = []
+        for _ in range(self.rng.randint(1, 3)):
+            product_id, _, min_order_qty = self.product()
+            await self.request("add", "POST", "/user/cart/add", params={"product_id": product_id, "qty": min_order_qty})
+            added.append(product_id)
+        await self.request("view", "GET", "/user/cart")
+        await self.request("decrease", "PUT", "/user/cart/decrease", params={"product_id": added[0]}, expect=(200, 404))
+        for product_id in added:
+            await self.request("remove", "DELETE", "/user/cart/remove", params={"product_id": product_id})
+
+    async def enquiry(self):
+        product_id, price, min_order_qty = self.product()
+        qty = max(min_order_qty, math.ceil(MIN_ENQUIRY_TOTAL / max(price, 1)))
+        await self.request("add", "POST", "/user/cart/add", params={"product_id": product_id, "qty": qty})
+        await self.request("view", "GET", "/user/cart")
+        await self.request("submit", "POST", "/user/enquiry", params={
+            "customer_name": "Load Test",
+            "email": "load-test@example.com",
+            "phone": "9999999999",
+            "address": "1 Benchmark Road"
+        })
+
+    async def admin(self):
+        offset = self.rng.randrange(0, max(len(self.catalog.products) - 20, 1))
+        await self.request("products", "GET", "/admin/products", params={"offset": offset, "limit": 20})
+        product_id = self.product()[0]
+        await self.request("edit_product", "PUT", f"/admin/products/{product_id}", params={"stock": 10_000_000})
+        await self.request("enquiries", "GET", "/admin/enquiries", params={"limit": 20})
+        await self.request("activity_logs", "GET", "/admin/activity-logs", params={"limit": 20})
+
+    async def loop(self, mix, deadline):
+        scenarios, weights = zip(*mix.items())
+        while time.perf_counter() < deadline:
+            self.scenario = self.rng.choices(scenarios, weights)[0]
+            await getattr(self, self.scenario)()
+            if self.run.recording:
+                self.run.journeys[self.scenario] += 1
+
+
+def parse_mix(value: str):
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; expected {', '.join(SCENARIOS)}")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+async def drive(args, catalog: Catalog, transport, base_url):
+    from app.core.jwt import create_access_token
+
+    run = Run()
+    admin_token = create_access_token({"sub": catalog.admin_id}) if catalog.admin_id else None
+    mix = args.mix
+    if "admin" in mix and not admin_token:
+        print("No super admin found; skipping the admin scenario", file=sys.stderr)
+        mix = {k: v for k, v in mix.items() if k != "admin"}
+
+    clients = []
+    for _ in range(args.concurrency):
+        client = httpx.AsyncClient(
+            transport=transport,
+            base_url=base_url,
+            timeout=args.timeout,
+            limits=httpx.Limits(max_connections=4)
+        )
+        if admin_token:
+            client.cookies.set("admin_token", admin_token)
+        clients.append(client)
+
+    try:
+        started = time.perf_counter()
+        deadline = started + args.warmup + args.duration
+        users = [
+            VirtualUser(client, catalog, run, random.Random(args.seed + i))
+            for i, client in enumerate(clients)
+        ]
+        tasks = [asyncio.create_task(user.loop(mix, deadline)) for user in users]
+
+        await asyncio.sleep(args.warmup)
+        run.recording = True
+        recording_started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        # Journeys still in flight at the deadline finish after it
+        elapsed = time.perf_counter() - recording_started
+    finally:
+        for client in clients:
+            await client.aclose()
+
+    return run.results(elapsed)
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit("App did not become ready")
+
+
+async def run_load(args, catalog: Catalog):
+    if args.base_url:
+        async with httpx.AsyncClient(base_url=args.base_url) as client:
+            await wait_until_ready(client)
+        return await drive(args, catalog, None, args.base_url)
+
+    from app.main import app
+    from app.db.async_session import async_engine
+    import app.routes.user_routes as user_routes
+
+    def send_mail(to_email, subject, html_content):
+        # Stand-in for the email provider so runs never send real mail
+        time.sleep(args.mail_ms / 1000)
+        return True
+
+    user_routes.send_mail = send_mail
+
+    transport = httpx.ASGITransport(app=app)
+    # https so the session cookie (secure in production) is sent back
+    base_url = "https://bench"
+    try:
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+                await wait_until_ready(client)
+            return await drive(args, catalog, transport, base_url)
+    finally:
+        await async_engine.dispose()
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def error_rate_pct(summary):
+    return summary["errors"] / summary["requests"] * 100 if summary["requests"] else 0.0
+
+
+def compare(results, baseline, tolerance_pct, error_tolerance_pct):
+    """
+    Scenarios whose p95 latency rose, or throughput fell, by more than
+    tolerance_pct, or whose error rate rose by more than
+    error_tolerance_pct points. Errors are checked on their own because
+    a change that turns requests into fast 4xx/5xx improves p95.
+    A baseline scenario with no timings in this run (dropped from --mix,
+    or every request failed) counts as regressed.
+    """
+    regressions = []
+    for name, previous in baseline["results"]["scenarios"].items():
+        current = results["scenarios"].get(name)
+        if "p95_ms" not in previous:
+            continue
+        if not current or "p95_ms" not in current:
+            regressions.append({"scenario": name, "missing": True, "regressed": True})
+            continue
+        p95_change = (current["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100
+        rps_change = (current["rps"] - previous["rps"]) / previous["rps"] * 100 if previous["rps"] else 0
+        error_rates = [round(error_rate_pct(previous), 2), round(error_rate_pct(current), 2)]
+        row = {
+            "scenario": name,
+            "p95_ms": [previous["p95_ms"], current["p95_ms"]],
+            "p95_change_pct": round(p95_change, 1),
+            "rps": [previous["rps"], current["rps"]],
+            "rps_change_pct": round(rps_change, 1),
+            "error_rate_pct": error_rates,
+            "regressed": (
+                p95_change > tolerance_pct
+                or -rps_change > tolerance_pct
+                or error_rates[1] - error_rates[0] > error_tolerance_pct
+            )
+        }
+        regressions.append(row)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--reset", action="store_true", help="wipe DATABASE_URL and seed a fresh catalog")
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--brands", type=int, default=50)
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--seed-workers", type=int, default=4, help="parallel COPY workers for --reset")
+    parser.add_argument("--concurrency", type=int, default=50, help="virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before that")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX, help=f"scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout")
+    parser.add_argument("--mail-ms", type=float, default=0, help="simulated email provider latency (in-process only)")
+    parser.add_argument("--base-url", help="drive a running server instead of the app in-process")
+    parser.add_argument("--output", help="write the results here (baseline for --compare)")
+    parser.add_argument("--compare", help="earlier --output file to compare against")
+    parser.add_argument("--tolerance-pct", type=float, default=20)
+    parser.add_argument(
+        "--error-tolerance-pct", type=float, default=1,
+        help="allowed rise in a scenario's error rate, in percentage points"
+    )
+    args = parser.parse_args()
+
+    # One client address for every virtual user would trip the per-IP
+    # limits; admission control stays on. Both must be set before the
+    # app reads its settings.
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    from sqlalchemy.engine import make_url
+
+    from app.core.config import settings
+    from app.db.session import engine
+
+    if args.reset:
+        from app.db.seed_data import Scale, seed
+
+        # Default history (enquiries, visits, logs) so admin paging has data
+        scale = Scale(categories=args.categories, brands=args.brands, products=args.products)
+        seed(scale, args.seed, args.seed_workers, progress=lambda message: print(message, file=sys.stderr))
+        # Don't serve the previous run's catalog while the new one builds
+        if os.path.exists(settings.CATALOG_SNAPSHOT_PATH):
+            os.remove(settings.CATALOG_SNAPSHOT_PATH)
+    catalog = load_catalog(engine)
+
+    results = asyncio.run(run_load(args, catalog))
+    engine.dispose()
+
+    config = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": make_url(settings.DATABASE_URL).get_backend_name(),
+            "catalog": {
+                "categories": len(catalog.categories),
+                "brands": len(catalog.brands),
+                "products": len(catalog.products)
+            }
+        },
+        "config": config,
+        "results": results
+    }
+
+    regressed = False
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["comparison"] = {
+            "baseline_commit": baseline.get("meta", {}).get("commit"),
+            "tolerance_pct": args.tolerance_pct,
+            "error_tolerance_pct": args.error_tolerance_pct,
+            "scenarios": compare(results, baseline, args.tolerance_pct, args.error_tolerance_pct)
+        }
+        regressed = any(row["regressed"] for row in report["comparison"]["scenarios"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if regressed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
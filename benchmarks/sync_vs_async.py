@@ -0,0 +1,109 @@
+"""
+Compare the sync (psycopg2 Session in a threadpool) and async (asyncpg
+AsyncSession on the event loop) data paths under the same load.
+
+Both paths serve the same catalog query from a minimal FastAPI app and
+are driven in-process by the same number of concurrent clients.
+--sleep-ms adds pg_sleep() to each request to model slow queries, which
+is where the threadpool cap shows.
+
+    python -m benchmarks.sync_vs_async --requests 2000 --concurrency 200 --sleep-ms 20
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+import app.db.base  # noqa: F401  registers every model
+from app.db.async_session import async_engine, get_async_db
+from app.db.session import engine, get_db
+from app.models.products import Product
+
+
+def build_apps(limit: int, sleep_ms: int):
+    statement = select(Product.product_id, Product.name, Product.price).where(
+        Product.is_active == True
+    ).limit(limit)
+    sleep = select(func.pg_sleep(sleep_ms / 1000))
+
+    sync_app = FastAPI()
+
+    @sync_app.get("/products")
+    def sync_products(db: Session = Depends(get_db)):
+        if sleep_ms:
+            db.execute(sleep)
+        return [dict(row._mapping) for row in db.execute(statement)]
+
+    async_app = FastAPI()
+
+    @async_app.get("/products")
+    async def async_products(db: AsyncSession = Depends(get_async_db)):
+        if sleep_ms:
+            await db.execute(sleep)
+        return [dict(row._mapping) for row in await db.execute(statement)]
+
+    return {"sync": sync_app, "async": async_app}
+
+
+async def drive(app, requests: int, concurrency: int):
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60) as client:
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.get("/products")
+                latencies.append(time.perf_counter() - start)
+                if response.status_code != 200:
+                    errors += 1
+
+        # Warm the pools before timing
+        await client.get("/products")
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=50, help="products per response")
+    parser.add_argument("--sleep-ms", type=int, default=0, help="pg_sleep per request")
+    args = parser.parse_args()
+
+    results = {}
+    for name, app in build_apps(args.limit, args.sleep_ms).items():
+        results[name] = await drive(app, args.requests, args.concurrency)
+
+    await async_engine.dispose()
+    engine.dispose()
+    print(json.dumps({"config": vars(args), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())